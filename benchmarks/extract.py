@@ -0,0 +1,108 @@
+"""Compare value extractors with the templates they replace
+
+Renders each template and runs the equivalent extractor on the same output
+many times, and reports the time per value of each. Both must agree on the
+value for a case to count.
+
+    python benchmarks/extract.py --iterations 20000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.template import Template
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from custom_components.ssh.extract import ValueExtractor, ValueType  # noqa: E402
+from custom_components.ssh.source import JsonPathSelector, RegexSelector  # noqa: E402
+
+CASES: list[tuple[str, str, str, ValueExtractor]] = [
+    (
+        "json_path",
+        json.dumps({"ports": {f"swp{i}": {"poe": i * 1.5, "up": True} for i in range(48)}}),
+        "{{ value_json.ports.swp7.poe }}",
+        ValueExtractor(JsonPathSelector("ports.swp7.poe"), value_type=ValueType.FLOAT),
+    ),
+    (
+        "regex",
+        "fan=3200rpm temp=48.3C psu=ok\n",
+        "{{ value | regex_findall_index('temp=([0-9.]+)') | float }}",
+        ValueExtractor(RegexSelector(re.compile(r"temp=([0-9.]+)")), value_type=ValueType.FLOAT),
+    ),
+    (
+        "field",
+        "0.07 0.15 0.16 2/79 22307\n",
+        "{{ value.split()[1] | float }}",
+        ValueExtractor(field=1, value_type=ValueType.FLOAT),
+    ),
+    (
+        "int",
+        "42\n",
+        "{{ value | int }}",
+        ValueExtractor(value_type=ValueType.INT),
+    ),
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10000, help="values per case")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args()
+
+
+def per_call_us(func: Any, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def async_measure(args: argparse.Namespace) -> list[dict[str, Any]]:
+    hass = HomeAssistant()
+    rows = []
+    for name, output, source, extractor in CASES:
+        template = Template(source, hass)
+        render = lambda: template.async_render_with_possible_json_value(output, None)  # noqa: E731
+        extract = lambda: extractor.extract(output)  # noqa: E731
+        if float(render()) != float(extract()):
+            raise SystemExit(f"{name}: template gave {render()!r}, extractor {extract()!r}")
+        template_us = per_call_us(render, args.iterations)
+        extractor_us = per_call_us(extract, args.iterations)
+        rows.append(
+            {
+                "case": name,
+                "template_us": round(template_us, 2),
+                "extractor_us": round(extractor_us, 2),
+                "speedup": round(template_us / extractor_us, 1),
+            }
+        )
+    await hass.async_stop(force=True)
+    return rows
+
+
+def main() -> None:
+    args = parse_args()
+    rows = asyncio.run(async_measure(args))
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    for row in rows:
+        print(
+            f"{row['case']:<10} template {row['template_us']:>8} us"
+            f"  extractor {row['extractor_us']:>8} us  {row['speedup']:>6}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""In-process stand-in SSH server for benchmarking the SSH integration
+
+Accepts any username and password or key, and answers every exec request
+with a fixed payload after a configurable delay. Shells answer each framed
+command the integration writes to them the same way, one at a time. Nothing
+is run on the machine, so results depend only on the integration and the
+chosen latency.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import re
+import socket
+import threading
+import time
+
+import paramiko
+
+THREAD_PREFIX = "fake-ssh"
+
+# Sentinels of the framed commands and shell syncs the integration sends
+_COMMAND = re.compile(rb"printf '(HASS-SSH-[0-9a-f]+)-begin")
+_SYNC = re.compile(rb"printf '\\n(HASS-SSH-[0-9a-f]+) 0")
+
+
+class _Dispatcher:
+    """Send delayed replies from a single thread instead of one per exec"""
+
+    def __init__(self) -> None:
+        self._queue: list[tuple[float, int, _Server, paramiko.Channel, bytes]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        threading.Thread(target=self._run, name=f"{THREAD_PREFIX}-dispatch", daemon=True).start()
+
+    def schedule(
+        self, delay: float, server: _Server, channel: paramiko.Channel, payload: bytes
+    ) -> None:
+        with self._condition:
+            heapq.heappush(
+                self._queue,
+                (time.monotonic() + delay, next(self._counter), server, channel, payload),
+            )
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    timeout = self._queue[0][0] - time.monotonic() if self._queue else None
+                    self._condition.wait(timeout)
+                _, _, server, channel, payload = heapq.heappop(self._queue)
+            try:
+                channel.sendall(payload)
+                channel.send_exit_status(0)
+                channel.close()
+            except (OSError, EOFError, paramiko.SSHException):
+                pass # Client gave up on the channel, for example after a timeout
+            finally:
+                server.sessions -= 1
+
+
+class _Server(paramiko.ServerInterface):
+    """One client connection, refusing channels beyond the host's max_sessions like sshd"""
+
+    def __init__(self, host: FakeSSHServer) -> None:
+        self._host = host
+        self.sessions = 0
+
+    def get_allowed_auths(self, username: str) -> str:
+        return "password,publickey"
+
+    def check_auth_password(self, username: str, password: str) -> int:
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_auth_publickey(self, username: str, key: paramiko.PKey) -> int:
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind: str, chanid: int) -> int:
+        if self._host.max_sessions and self.sessions >= self._host.max_sessions:
+            self._host.refused += 1
+            return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+        self.sessions += 1
+        return paramiko.OPEN_SUCCEEDED
+
+    def check_channel_exec_request(self, channel: paramiko.Channel, command: bytes) -> bool:
+        self._host.execs += 1
+        self._host.dispatcher.schedule(self._host.latency, self, channel, self._host.payload)
+        return True
+
+    def check_channel_shell_request(self, channel: paramiko.Channel) -> bool:
+        threading.Thread(
+            target=self._host.serve_shell,
+            args=(self, channel),
+            name=f"{THREAD_PREFIX}-shell-{self._host.port}",
+            daemon=True,
+        ).start()
+        return True
+
+
+class FakeSSHServer:
+    """One fake host listening on an ephemeral port of 127.0.0.1"""
+
+    def __init__(
+        self,
+        host_key: paramiko.PKey,
+        dispatcher: _Dispatcher,
+        latency: float,
+        output_bytes: int,
+        max_sessions: int | None = None,
+    ) -> None:
+        self.host_key = host_key
+        self.dispatcher = dispatcher
+        self.latency = latency
+        # State commands of switches read "1", so the payload starts with it
+        self.payload = (b"1\n" + b"x" * output_bytes)[:max(output_bytes, 2)]
+        self.max_sessions = max_sessions
+        self.connections = 0
+        self.execs = 0
+        self.refused = 0
+        self._sock = socket.socket()
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(128)
+        self.port: int = self._sock.getsockname()[1]
+
+    def start(self) -> None:
+        threading.Thread(
+            target=self._accept, name=f"{THREAD_PREFIX}-accept-{self.port}", daemon=True
+        ).start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            transport = paramiko.Transport(client)
+            transport.name = f"{THREAD_PREFIX}-transport-{self.port}"
+            transport.add_server_key(self.host_key)
+            try:
+                transport.start_server(server=_Server(self))
+            except (paramiko.SSHException, EOFError):
+                continue # Handshake refused, for example no common algorithm
+
+    def serve_shell(self, server: _Server, channel: paramiko.Channel) -> None:
+        """Answer framed commands written to a shell, like a real shell would"""
+        buffer = b""
+        try:
+            while data := channel.recv(65536):
+                # Every script the integration writes ends with the stderr sentinel
+                *scripts, buffer = (buffer + data).split(b" >&2\n")
+                for script in scripts:
+                    if match := _COMMAND.search(script):
+                        sentinel = match.group(1)
+                        self.execs += 1
+                        time.sleep(self.latency)
+                        channel.sendall(
+                            sentinel + b"-begin\n" + self.payload + b"\n" + sentinel + b" 0\n"
+                        )
+                        channel.sendall_stderr(sentinel + b"-begin\n\n" + sentinel + b"\n")
+                    elif match := _SYNC.search(script):
+                        channel.sendall(b"\n" + match.group(1) + b" 0\n")
+                        channel.sendall_stderr(b"\n" + match.group(1) + b"\n")
+        except (OSError, EOFError, paramiko.SSHException):
+            pass # Client closed the shell
+        finally:
+            server.sessions -= 1
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+def start_servers(
+    count: int, latency: float, output_bytes: int, max_sessions: int | None = None
+) -> list[FakeSSHServer]:
+    """Start fake hosts sharing one host key and one reply thread"""
+    host_key = paramiko.RSAKey.generate(2048)
+    dispatcher = _Dispatcher()
+    servers = [
+        FakeSSHServer(host_key, dispatcher, latency, output_bytes, max_sessions)
+        for _ in range(count)
+    ]
+    for server in servers:
+        server.start()
+    return servers
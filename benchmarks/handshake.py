@@ -0,0 +1,100 @@
+"""Measure what each key exchange and host key algorithm costs against a host
+
+Runs the SSH handshake (TCP connect, key exchange and host key check, no
+authentication) repeatedly for every combination the host accepts, and
+reports the median and slowest time of each. The cheapest rows are
+candidates for the kex_algorithms and host_key_algorithms options of
+devices with weak CPUs.
+
+    python benchmarks/handshake.py --host 192.0.2.10 --attempts 10
+    python benchmarks/handshake.py --fake
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import socket
+import statistics
+import time
+from typing import Any
+
+import paramiko
+
+from fake_ssh_server import start_servers
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=22)
+    parser.add_argument("--attempts", type=int, default=5, help="handshakes per combination")
+    parser.add_argument("--timeout", type=float, default=10, help="seconds per handshake")
+    parser.add_argument(
+        "--kex", nargs="+", default=list(paramiko.Transport._preferred_kex),
+        help="key exchange algorithms to try",
+    )
+    parser.add_argument(
+        "--host-keys", nargs="+", default=list(paramiko.Transport._preferred_keys),
+        help="host key algorithms to try",
+    )
+    parser.add_argument("--fake", action="store_true", help="measure a local stand-in server")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args()
+
+
+def handshake(args: argparse.Namespace, kex: str, host_key: str) -> float:
+    """Seconds for one handshake offering only the given algorithms"""
+    start = time.monotonic()
+    sock = socket.create_connection((args.host, args.port), args.timeout)
+    transport = paramiko.Transport(sock)
+    try:
+        options = transport.get_security_options()
+        options.kex = (kex,)
+        options.key_types = (host_key,)
+        transport.start_client(timeout=args.timeout)
+        return time.monotonic() - start
+    finally:
+        transport.close()
+
+
+def measure(args: argparse.Namespace) -> list[dict[str, Any]]:
+    rows = []
+    for kex in args.kex:
+        for host_key in args.host_keys:
+            row: dict[str, Any] = {"kex": kex, "host_key": host_key}
+            try:
+                times = [handshake(args, kex, host_key) * 1000 for _ in range(args.attempts)]
+            except (paramiko.SSHException, EOFError, OSError) as err: # Not offered by the host
+                row["error"] = str(err)
+            else:
+                row["median_ms"] = round(statistics.median(times), 1)
+                row["max_ms"] = round(max(times), 1)
+            rows.append(row)
+    # Cheapest first, unsupported combinations last
+    return sorted(rows, key=lambda row: row.get("median_ms", float("inf")))
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    # Rejected combinations are expected and reported in the table instead
+    logging.getLogger("paramiko.transport").setLevel(logging.CRITICAL)
+    if args.fake:
+        server = start_servers(1, 0, 0)[0]
+        args.host, args.port = "127.0.0.1", server.port
+    rows = measure(args)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    for row in rows:
+        result = (
+            f"{row['median_ms']:>8} ms median {row['max_ms']:>8} ms max"
+            if "median_ms" in row
+            else "not accepted"
+        )
+        print(f"{row['kex']:<40} {row['host_key']:<22} {result}")
+
+
+if __name__ == "__main__":
+    main()
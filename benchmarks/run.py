@@ -0,0 +1,261 @@
+"""Load test the SSH integration against local stand-in SSH servers
+
+Starts M fake hosts and a minimal Home Assistant instance, sets up N SSH
+sensors and switches spread across the hosts, lets them poll for a while and
+reports throughput, latency, connections, threads and memory. Runs offline.
+
+    python benchmarks/run.py --hosts 4 --sensors 200 --switches 50 --duration 30
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Any
+
+from homeassistant import bootstrap
+from homeassistant.config_entries import ConfigEntries
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from fake_ssh_server import THREAD_PREFIX, FakeSSHServer, start_servers
+
+REPO = Path(__file__).resolve().parent.parent
+DOMAIN = "ssh"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=4, help="fake hosts (M)")
+    parser.add_argument("--sensors", type=int, default=100, help="sensor entities")
+    parser.add_argument("--switches", type=int, default=20, help="switch entities")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to measure")
+    parser.add_argument("--scan-interval", type=int, default=1, help="seconds between polls")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per command")
+    parser.add_argument("--output-bytes", type=int, default=256, help="bytes per command")
+    parser.add_argument(
+        "--server-max-sessions", type=int, default=10,
+        help="channels each fake host accepts at once, like sshd's MaxSessions (0 for no limit)",
+    )
+    parser.add_argument("--max-sessions", type=int, help="max_sessions option of the entities")
+    parser.add_argument("--min-scan-interval", type=int, help="min_scan_interval of the entities")
+    parser.add_argument("--max-scan-interval", type=int, help="max_scan_interval of the entities")
+    parser.add_argument("--backend", choices=["asyncssh", "paramiko"], default="asyncssh")
+    parser.add_argument(
+        "--shell", action="store_true", help="run commands in one persistent shell per host"
+    )
+    parser.add_argument("--workers", type=int, help="workers option of the integration (paramiko)")
+    parser.add_argument("--worker-queue", type=int, help="worker_queue option of the integration")
+    parser.add_argument(
+        "--worker-per-host", action="store_true", help="give each host a single worker thread of its own"
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args()
+
+
+def entity_configs(
+    args: argparse.Namespace, servers: list[FakeSSHServer]
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Spread the entities round robin across the fake hosts"""
+
+    options = {
+        option: value
+        for option, value in (
+            ("max_sessions", args.max_sessions),
+            ("min_scan_interval", args.min_scan_interval),
+            ("max_scan_interval", args.max_scan_interval),
+        )
+        if value is not None
+    }
+
+    def base(index: int) -> dict[str, Any]:
+        return {
+            "platform": DOMAIN,
+            "host": "127.0.0.1",
+            "port": servers[index % len(servers)].port,
+            "username": "bench",
+            "password": "bench",
+            "backend": args.backend,
+            "shell": args.shell,
+            "scan_interval": args.scan_interval,
+            **options,
+        }
+
+    sensors = [
+        {
+            **base(index),
+            "name": f"bench_sensor_{index}",
+            "unique_id": f"bench_sensor_{index}",
+            "command": f"cat /sys/class/poe/port{index}/power",
+            "value_template": "{{ (value or '') | length }}",
+        }
+        for index in range(args.sensors)
+    ]
+    switches = [
+        {
+            **base(index),
+            "name": f"bench_switch_{index}",
+            "unique_id": f"bench_switch_{index}",
+            "command_on": f"poe on port{index}",
+            "command_off": f"poe off port{index}",
+            "command_state": f"poe status port{index}",
+        }
+        for index in range(args.switches)
+    ]
+    return sensors, switches
+
+
+def integration_config(args: argparse.Namespace) -> dict[str, Any]:
+    """The integration's own options, which apply to every host"""
+    config: dict[str, Any] = {"worker_per_host": args.worker_per_host}
+    if args.workers is not None:
+        config["workers"] = args.workers
+    if args.worker_queue is not None:
+        config["worker_queue"] = args.worker_queue
+    return config
+
+
+async def async_start_hass(config_dir: str) -> HomeAssistant:
+    """Bring up just enough of Home Assistant to load YAML platforms"""
+    hass = HomeAssistant()
+    hass.config.config_dir = config_dir
+    hass.config.skip_pip = True
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await bootstrap.load_registries(hass)
+    return hass
+
+
+class ThreadSampler:
+    """Track the peak number of threads, leaving out the fake servers' own"""
+
+    def __init__(self) -> None:
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(0.1):
+            count = sum(
+                not thread.name.startswith(THREAD_PREFIX) for thread in threading.enumerate()
+            )
+            self.peak = max(self.peak, count)
+
+    def __enter__(self) -> ThreadSampler:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def merged_latency(pool: Any) -> dict[str, Any]:
+    """Combine the per-host command latency histograms into one"""
+    from custom_components.ssh.metrics import LatencyHistogram
+
+    merged = LatencyHistogram()
+    for connection in pool._connections.values():
+        latency = connection.metrics.latency
+        merged.buckets = [a + b for a, b in zip(merged.buckets, latency.buckets)]
+        merged.count += latency.count
+        merged.total += latency.total
+        merged.max = max(merged.max, latency.max)
+    return merged.as_dict()
+
+
+async def async_main(args: argparse.Namespace) -> dict[str, Any]:
+    servers = start_servers(
+        args.hosts, args.latency, args.output_bytes, args.server_max_sessions
+    )
+    config_dir = tempfile.mkdtemp(prefix="ssh-bench-")
+    os.symlink(REPO / "custom_components", Path(config_dir) / "custom_components")
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    sensors, switches = entity_configs(args, servers)
+
+    try:
+        hass = await async_start_hass(config_dir)
+        with ThreadSampler() as threads:
+            setup_start = time.monotonic()
+            await async_setup_component(hass, DOMAIN, {DOMAIN: integration_config(args)})
+            await async_setup_component(hass, "sensor", {"sensor": sensors})
+            await async_setup_component(hass, "switch", {"switch": switches})
+            await hass.async_start()
+            setup_time = time.monotonic() - setup_start
+
+            execs_before = sum(server.execs for server in servers)
+            await asyncio.sleep(args.duration)
+            execs = sum(server.execs for server in servers) - execs_before
+
+            pool = hass.data[DOMAIN]["pool"]
+            latency = merged_latency(pool)
+            connections = list(pool._connections.values())
+            timeouts = sum(connection.metrics.timeouts for connection in connections)
+            failures = sum(
+                stats.failures
+                for connection in connections
+                for stats in connection.metrics.commands.values()
+            )
+            workers = pool.as_dict()["workers"].values()
+            await hass.async_stop()
+    finally:
+        for server in servers:
+            server.close()
+        shutil.rmtree(config_dir, ignore_errors=True)
+
+    entities = args.sensors + args.switches
+    return {
+        "backend": args.backend,
+        "hosts": args.hosts,
+        "entities": entities,
+        "setup_seconds": round(setup_time, 2),
+        "polls_per_second": round(execs / args.duration, 1),
+        "expected_polls_per_second": round(entities / args.scan_interval, 1),
+        "latency_mean_ms": latency["mean_ms"],
+        # Upper bounds of the histogram buckets holding each percentile
+        "latency_p50_ms": latency["p50_ms"],
+        "latency_p99_ms": latency["p99_ms"],
+        "latency_max_ms": latency["max_ms"],
+        "failures": failures,
+        "timeouts": timeouts,
+        "connections_opened": sum(server.connections for server in servers),
+        "sessions_refused": sum(server.refused for server in servers),
+        # Calls skipped because every worker was busy and the queue was full
+        "worker_rejections": sum(pool_workers["rejected"] for pool_workers in workers),
+        "worker_peak_queued": max(pool_workers["peak_queued"] for pool_workers in workers),
+        "peak_threads": threads.peak,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_growth_mb": round(
+            (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1
+        ),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    sys.path.insert(0, str(REPO))
+    logging.basicConfig(level=logging.WARNING)
+    # Untested custom integration warnings are expected here
+    logging.getLogger("homeassistant.loader").setLevel(logging.ERROR)
+    # The fake servers' transports log every client disconnect on shutdown
+    logging.getLogger("paramiko.transport").setLevel(logging.CRITICAL)
+    report = asyncio.run(async_main(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    width = max(len(key) for key in report)
+    for key, value in report.items():
+        print(f"{key:<{width}}  {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,160 @@
+"""The SSH integration"""
+from __future__ import annotations
 
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    CONF_COMMAND,
+    CONF_PASSWORD,
+    CONF_PORT,
+    CONF_TIMEOUT,
+    CONF_USERNAME,
+)
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util.json import save_json
+
+from .const import (
+    BACKENDS,
+    CONF_BACKEND,
+    CONF_HOSTS,
+    CONF_KEY,
+    CONF_MAX_PARALLEL,
+    CONF_USE_AGENT,
+    CONF_WORKER_PER_HOST,
+    CONF_WORKER_QUEUE,
+    CONF_WORKERS,
+    DATA_CONFIG,
+    DEFAULT_BACKEND,
+    DEFAULT_EXECUTE_TIMEOUT,
+    DEFAULT_MAX_PARALLEL,
+    DEFAULT_WORKER_QUEUE,
+    DEFAULT_WORKERS,
+    DIAGNOSTICS_FILE,
+    DOMAIN,
+    EVENT_EXECUTED,
+    SERVICE_DUMP_DIAGNOSTICS,
+    SERVICE_EXECUTE,
+)
+from .diagnostics import async_get_diagnostics
+from .execute import async_execute
+from .pool import async_get_pool
+from .transport import SSHConnection
+
+try:
+    from homeassistant.core import SupportsResponse
+except ImportError: # Before 2023.7 services cannot return data, the event still carries it
+    SupportsResponse = None
+
+_LOGGER = logging.getLogger(__name__)
+
+CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(DOMAIN): vol.Schema(
+            {
+                vol.Optional(CONF_WORKERS, default=DEFAULT_WORKERS): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
+                vol.Optional(CONF_WORKER_QUEUE, default=DEFAULT_WORKER_QUEUE): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
+                vol.Optional(CONF_WORKER_PER_HOST, default=False): cv.boolean,
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+# Same defaults as the platforms
+DEFAULT_KEY = '/config/alcazar-switch'
+DEFAULT_USERNAME = 'cumulus'
+
+EXECUTE_SCHEMA = vol.All(
+    cv.has_at_least_one_key(CONF_HOSTS, ATTR_ENTITY_ID),
+    vol.Schema(
+        {
+            vol.Required(CONF_COMMAND): cv.string,
+            vol.Optional(ATTR_ENTITY_ID, default=[]): cv.entity_ids,
+            vol.Optional(CONF_HOSTS, default=[]): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(CONF_PORT, default=22): cv.port,
+            vol.Optional(CONF_USERNAME, default=DEFAULT_USERNAME): cv.string,
+            vol.Optional(CONF_KEY, default=DEFAULT_KEY): cv.string,
+            vol.Optional(CONF_PASSWORD): cv.string,
+            vol.Optional(CONF_BACKEND, default=DEFAULT_BACKEND): vol.In(BACKENDS),
+            vol.Optional(CONF_USE_AGENT, default=False): cv.boolean,
+            vol.Optional(CONF_MAX_PARALLEL, default=DEFAULT_MAX_PARALLEL): cv.positive_int,
+            vol.Optional(CONF_TIMEOUT, default=DEFAULT_EXECUTE_TIMEOUT): vol.All(
+                vol.Coerce(float), vol.Range(min=0, min_included=False)
+            ),
+        }
+    ),
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the SSH services"""
+    # Read by the connection pool, which the platforms create after this runs
+    hass.data.setdefault(DOMAIN, {})[DATA_CONFIG] = config.get(DOMAIN, {})
+
+    async def async_dump_diagnostics(call: ServiceCall) -> None:
+        """Write diagnostics for every host to the config directory"""
+        path = hass.config.path(DIAGNOSTICS_FILE)
+        await hass.async_add_executor_job(save_json, path, async_get_diagnostics(hass))
+        _LOGGER.info("Wrote SSH diagnostics to %s", path)
+
+    hass.services.async_register(DOMAIN, SERVICE_DUMP_DIAGNOSTICS, async_dump_diagnostics)
+
+    async def async_execute_command(call: ServiceCall) -> dict[str, Any]:
+        """Run a command on every listed host and entity's host at once"""
+        pool = async_get_pool(hass)
+        targets: dict[str, SSHConnection] = {}
+        try:
+            for entity_id in call.data.get(ATTR_ENTITY_ID, []):
+                if (connection := pool.async_acquire_entity(entity_id)) is None:
+                    raise HomeAssistantError(f"{entity_id} is not an SSH entity")
+                targets[entity_id] = connection
+        except HomeAssistantError:
+            for connection in targets.values():
+                await pool.async_release(connection)
+            raise
+        for host in call.data[CONF_HOSTS]:
+            if host in targets: # Listed twice
+                continue
+            targets[host] = pool.async_acquire(
+                host,
+                call.data[CONF_PORT],
+                call.data[CONF_USERNAME],
+                call.data[CONF_KEY],
+                call.data.get(CONF_PASSWORD),
+                call.data[CONF_BACKEND],
+                call.data[CONF_USE_AGENT],
+            )
+        response = await async_execute(
+            pool,
+            call.data[CONF_COMMAND],
+            targets,
+            call.data[CONF_MAX_PARALLEL],
+            call.data[CONF_TIMEOUT],
+        )
+        hass.bus.async_fire(EVENT_EXECUTED, response, context=call.context)
+        return response
+
+    if SupportsResponse is None:
+        hass.services.async_register(
+            DOMAIN, SERVICE_EXECUTE, async_execute_command, EXECUTE_SCHEMA
+        )
+    else:
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_EXECUTE,
+            async_execute_command,
+            EXECUTE_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+    return True
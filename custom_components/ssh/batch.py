@@ -0,0 +1,156 @@
+"""Per-host command batching for the SSH integration"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from uuid import uuid4
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import BATCH_WINDOW
+from .reader import OutputCapture
+from .transport import CommandResult, SSHConnection
+
+_LOGGER = logging.getLogger(__name__)
+
+_PendingCommand = tuple[str, float | None, OutputCapture, asyncio.Future[CommandResult]]
+
+
+def build_batch(commands: list[str], marker: str) -> str:
+    """Join commands into one POSIX shell script, each followed by its exit code"""
+    lines = []
+    for index, command in enumerate(commands):
+        # Subshells keep an `exit` in one command from ending the whole batch
+        lines.append(
+            f"( {command}\n) </dev/null; rc=$?; "
+            f"printf '\\n{marker} {index} %d\\n' $rc; "
+            f"printf '\\n{marker} {index}\\n' >&2"
+        )
+    return "\n".join(lines)
+
+
+def split_batch(
+    result: CommandResult, marker: str, captures: list[OutputCapture]
+) -> list[CommandResult]:
+    """Demultiplex the output of a batch back into per-command results"""
+    stdout = result.stdout.split(f"\n{marker} ")
+    stderr = result.stderr.split(f"\n{marker} ")
+    results = []
+    for index, capture in enumerate(captures):
+        out = stdout[index] if index < len(stdout) else ""
+        err = stderr[index] if index < len(stderr) else ""
+        exit_status = None
+        if index + 1 < len(stdout): # The next segment starts with "<index> <rc>"
+            header, _, rest = stdout[index + 1].partition("\n")
+            stdout[index + 1] = rest
+            try:
+                exit_status = int(header.split()[1])
+            except (IndexError, ValueError):
+                pass
+        if index + 1 < len(stderr):
+            stderr[index + 1] = stderr[index + 1].partition("\n")[2]
+        out, truncated = capture.apply(out)
+        results.append(CommandResult(out, err, exit_status, truncated or result.truncated))
+    return results
+
+
+async def async_run_batch(
+    connection: SSHConnection,
+    commands: list[str],
+    timeout: float | None,
+    captures: list[OutputCapture],
+) -> list[CommandResult]:
+    """Run commands one after another in a single invocation and return each result"""
+    marker = f"HASS-SSH-{uuid4().hex}"
+    # Bounded by the combined budget, each command's capture is applied after splitting
+    budget = OutputCapture(sum(capture.max_bytes for capture in captures))
+    result = await connection.async_run(
+        build_batch(commands, marker), timeout, budget, f"<batch of {len(commands)}>"
+    )
+    return split_batch(result, marker, captures)
+
+
+class CommandBatcher:
+    """Gather commands due for one host in the same tick and run them together"""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        connection: SSHConnection,
+        window: float = BATCH_WINDOW,
+    ) -> None:
+        """Initialize the batcher"""
+        self.hass = hass
+        self._connection = connection
+        self.window = window
+        self._pending: list[_PendingCommand] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self.batches = 0
+        self.commands = 0
+
+    async def async_run(
+        self,
+        command: str,
+        timeout: float | None = None,
+        capture: OutputCapture | None = None,
+    ) -> CommandResult:
+        """Queue a command for the next batch and wait for its own result"""
+        return (await self.async_run_all([command], timeout, capture))[0]
+
+    async def async_run_all(
+        self,
+        commands: list[str],
+        timeout: float | None = None,
+        capture: OutputCapture | None = None,
+    ) -> list[CommandResult]:
+        """Queue commands back to back, so they run in order in the same batch"""
+        futures: list[asyncio.Future[CommandResult]] = []
+        for command in commands:
+            future: asyncio.Future[CommandResult] = self.hass.loop.create_future()
+            self._pending.append((command, timeout, capture or OutputCapture(), future))
+            futures.append(future)
+        if self._flush_handle is None:
+            self._flush_handle = self.hass.loop.call_later(self.window, self._flush)
+        return list(await asyncio.gather(*futures))
+
+    @callback
+    def _flush(self) -> None:
+        self._flush_handle = None
+        pending, self._pending = self._pending, []
+        self.hass.async_create_task(self._async_execute(pending))
+
+    async def _async_execute(self, pending: list[_PendingCommand]) -> None:
+        self.batches += 1
+        self.commands += len(pending)
+        commands = [command for command, _, _, _ in pending]
+        timeouts = [timeout for _, timeout, _, _ in pending]
+        captures = [capture for _, _, capture, _ in pending]
+        # The batch gets the most generous deadline of the commands it carries
+        timeout = None if None in timeouts else max(timeouts)
+        try:
+            if len(commands) == 1: # Nothing to batch, run it as is
+                results = [await self._connection.async_run(commands[0], timeout, captures[0])]
+            else:
+                results = await async_run_batch(self._connection, commands, timeout, captures)
+                _LOGGER.debug(
+                    "Ran %s commands on %s in one batch", len(commands), self._connection.name
+                )
+        except Exception as err: # Every waiter sees the same failure
+            for *_, future in pending:
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        for (*_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop a scheduled flush when the connection goes away"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for *_, future in self._pending:
+            future.cancel()
+        self._pending = []
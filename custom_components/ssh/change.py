@@ -0,0 +1,111 @@
+"""Change detection for the SSH integration"""
+from __future__ import annotations
+
+from datetime import timedelta
+import hashlib
+import time
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DATA_CHANGE_DETECTORS, DOMAIN
+
+
+def _digest(raw: str | None) -> bytes | None:
+    return None if raw is None else hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+
+def _as_float(value: Any) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ChangeDetector:
+    """Decide whether new output needs rendering and whether to write state
+
+    Output whose digest matches the last processed output skips template
+    rendering entirely. Rendered values within the deadband of the last
+    written value, or arriving sooner than min_interval after the last write,
+    skip the state write.
+    """
+
+    def __init__(
+        self,
+        deadband: float | None = None,
+        min_interval: timedelta | None = None,
+    ) -> None:
+        """Initialize the detector"""
+        self._deadband = deadband
+        self._min_interval = min_interval.total_seconds() if min_interval else None
+        self._digest: bytes | None = None
+        self._pending: bytes | None = None
+        self._last_value: Any = None
+        self._last_write: float | None = None
+        self.renders_skipped = 0
+        self.writes_skipped = 0
+        self.writes_performed = 0
+
+    def changed(self, raw: str | None) -> bool:
+        """Return False if the raw output matches what was last processed"""
+        digest = _digest(raw)
+        if self.writes_performed and digest == self._digest:
+            self.renders_skipped += 1
+            return False
+        self._pending = digest
+        return True
+
+    def should_write(self, value: Any) -> bool:
+        """Return True if the rendered value should be written to the state"""
+        now = time.monotonic()
+        if (
+            self._min_interval is not None
+            and self._last_write is not None
+            and now - self._last_write < self._min_interval
+        ):
+            # Not recorded as processed, so the next poll tries again
+            self.writes_skipped += 1
+            return False
+
+        if self._deadband is not None and self.writes_performed:
+            new, old = _as_float(value), _as_float(self._last_value)
+            if new is not None and old is not None and abs(new - old) < self._deadband:
+                self._digest = self._pending
+                self.writes_skipped += 1
+                return False
+
+        self._digest = self._pending
+        self._last_value = value
+        self._last_write = now
+        self.writes_performed += 1
+        return True
+
+    def invalidate(self) -> None:
+        """Forget the last processed output so the next one is rendered and written"""
+        self._digest = None
+
+    def as_dict(self) -> dict[str, int]:
+        return {
+            "renders_skipped": self.renders_skipped,
+            "writes_skipped": self.writes_skipped,
+            "writes_performed": self.writes_performed,
+        }
+
+
+@callback
+def async_track_detector(
+    hass: HomeAssistant, entity_id: str, detector: ChangeDetector
+) -> CALLBACK_TYPE:
+    """Show an entity's skipped and performed writes in the diagnostics, until the callback runs"""
+    detectors: dict[str, ChangeDetector] = hass.data.setdefault(DOMAIN, {}).setdefault(
+        DATA_CHANGE_DETECTORS, {}
+    )
+    detectors[entity_id] = detector
+
+    @callback
+    def async_untrack() -> None:
+        if detectors.get(entity_id) is detector:
+            del detectors[entity_id]
+
+    return async_untrack
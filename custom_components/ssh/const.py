@@ -0,0 +1,127 @@
+"""Constants for the SSH integration"""
+from typing import Final
+
+DOMAIN: Final = "ssh"
+
+# hass.data[DOMAIN] keys
+DATA_POOL: Final = "pool"
+DATA_SOURCES: Final = "sources"
+DATA_DIAGNOSTIC_SENSORS: Final = "diagnostic_sensors"
+DATA_SCHEDULER: Final = "scheduler"
+DATA_CHANGE_DETECTORS: Final = "change_detectors"
+
+CONF_DIAGNOSTICS: Final = "diagnostics"
+SERVICE_DUMP_DIAGNOSTICS: Final = "dump_diagnostics"
+DIAGNOSTICS_FILE: Final = "ssh_diagnostics.json"
+
+CONF_BACKEND: Final = "backend"
+CONF_COMMAND_TIMEOUT: Final = "command_timeout"
+CONF_USE_AGENT: Final = "use_agent"
+
+BACKEND_ASYNCSSH: Final = "asyncssh"
+BACKEND_PARAMIKO: Final = "paramiko"
+BACKENDS: Final = [BACKEND_ASYNCSSH, BACKEND_PARAMIKO]
+DEFAULT_BACKEND: Final = BACKEND_ASYNCSSH
+
+CONF_BATCH: Final = "batch"
+
+# Seconds to wait for more commands to the same host before sending a batch
+BATCH_WINDOW: Final = 0.25
+
+CONF_ACTION_WINDOW: Final = "action_window"
+CONF_CONFIRM: Final = "confirm"
+CONF_STATE_ON: Final = "state_on"
+
+CONF_WATCH: Final = "watch"
+CONF_DEADBAND: Final = "deadband"
+CONF_MIN_WRITE_INTERVAL: Final = "min_write_interval"
+CONF_SOURCE_JSON_PATH: Final = "source_json_path"
+CONF_SOURCE_REGEX: Final = "source_regex"
+
+# Seconds between attempts to restart a dropped watch command
+WATCH_RETRY_MIN: Final = 1
+WATCH_RETRY_MAX: Final = 60
+
+# Connection health
+KEEPALIVE_INTERVAL: Final = 15
+KEEPALIVE_COUNT_MAX: Final = 3
+PROBE_TIMEOUT: Final = 5
+CIRCUIT_FAILURE_THRESHOLD: Final = 3
+BACKOFF_MIN: Final = 5
+BACKOFF_MAX: Final = 300
+
+CONF_MAX_OUTPUT: Final = "max_output_bytes"
+CONF_CAPTURE: Final = "capture"
+CONF_CAPTURE_REGEX: Final = "capture_regex"
+
+DEFAULT_MAX_OUTPUT: Final = 65536
+READ_CHUNK_SIZE: Final = 32768
+
+# Upper bounds in milliseconds of the latency histogram buckets
+LATENCY_BUCKETS: Final = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+# Distinct commands tracked per host, so ad hoc commands cannot grow the stats forever
+MAX_COMMAND_STATS: Final = 100
+
+CONF_MIN_SCAN_INTERVAL: Final = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL: Final = "max_scan_interval"
+CONF_MAX_SESSIONS: Final = "max_sessions"
+
+# Channels open at once per host, below OpenSSH's default MaxSessions of 10
+DEFAULT_MAX_SESSIONS: Final = 8
+# First polls after startup are spread over up to this many seconds
+STARTUP_SPREAD: Final = 10
+# Seconds each connection opened in the background at startup may take
+WARM_UP_TIMEOUT: Final = 30
+# Each poll is scheduled within this fraction either side of its interval
+POLL_JITTER: Final = 0.1
+# Interval multipliers after stable and changed output, within the configured bounds
+POLL_BACKOFF: Final = 1.5
+POLL_TIGHTEN: Final = 0.5
+
+DATA_CONFIG: Final = "config"
+
+CONF_WORKERS: Final = "workers"
+CONF_WORKER_QUEUE: Final = "worker_queue"
+CONF_WORKER_PER_HOST: Final = "worker_per_host"
+
+# Threads running blocking paramiko calls, apart from Home Assistant's executor
+DEFAULT_WORKERS: Final = 16
+# Calls waiting for a worker before further ones are skipped
+DEFAULT_WORKER_QUEUE: Final = 64
+WORKER_THREAD_PREFIX: Final = "ssh_worker"
+
+CONF_KEX_ALGORITHMS: Final = "kex_algorithms"
+CONF_CIPHERS: Final = "ciphers"
+CONF_MACS: Final = "macs"
+CONF_HOST_KEY_ALGORITHMS: Final = "host_key_algorithms"
+CONF_COMPRESSION: Final = "compression"
+
+# Host keys trusted on first use, in the config directory
+KNOWN_HOSTS_FILE: Final = "ssh_known_hosts"
+
+CONF_KEY: Final = "key"
+CONF_JUMP_HOST: Final = "jump_host"
+CONF_JUMP_PORT: Final = "jump_port"
+CONF_JUMP_USERNAME: Final = "jump_username"
+CONF_JUMP_KEY: Final = "jump_key"
+CONF_JUMP_PASSWORD: Final = "jump_password"
+
+# Files here are always read, their mtime and size do not follow their contents
+PSEUDO_FILESYSTEMS: Final = ("/proc/", "/sys/")
+
+SERVICE_EXECUTE: Final = "execute"
+EVENT_EXECUTED: Final = "ssh_executed"
+CONF_HOSTS: Final = "hosts"
+CONF_MAX_PARALLEL: Final = "max_parallel"
+# Commands the execute service runs at once, across all hosts
+DEFAULT_MAX_PARALLEL: Final = 32
+# Seconds until the execute service gives up on hosts that have not answered
+DEFAULT_EXECUTE_TIMEOUT: Final = 30
+
+CONF_VALUE_JSON_PATH: Final = "value_json_path"
+CONF_VALUE_REGEX: Final = "value_regex"
+CONF_VALUE_FIELD: Final = "value_field"
+CONF_VALUE_SEPARATOR: Final = "value_separator"
+CONF_VALUE_TYPE: Final = "value_type"
+
+CONF_SHELL: Final = "shell"
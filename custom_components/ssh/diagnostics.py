@@ -0,0 +1,31 @@
+"""Diagnostics for the SSH integration"""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_CHANGE_DETECTORS, DATA_POOL, DATA_SCHEDULER, DATA_SOURCES, DOMAIN
+
+
+@callback
+def async_get_diagnostics(hass: HomeAssistant) -> dict[str, Any]:
+    """Collect health and performance data for every host, without credentials"""
+    domain_data = hass.data.get(DOMAIN, {})
+    diagnostics: dict[str, Any] = {"connections": [], "sources": [], "entities": []}
+    if (pool := domain_data.get(DATA_POOL)) is not None:
+        diagnostics.update(pool.as_dict())
+    if (scheduler := domain_data.get(DATA_SCHEDULER)) is not None:
+        diagnostics["scheduler"] = scheduler.as_dict()
+    for source in domain_data.get(DATA_SOURCES, {}).values():
+        diagnostics["sources"].append(
+            {
+                "connection": source.connection.name,
+                "command": source.command,
+                "listeners": source.listeners,
+                "engine": source.engine.as_dict(),
+            }
+        )
+    for entity_id, detector in domain_data.get(DATA_CHANGE_DETECTORS, {}).items():
+        diagnostics["entities"].append({"entity_id": entity_id, "change": detector.as_dict()})
+    return diagnostics
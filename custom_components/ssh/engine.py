@@ -0,0 +1,41 @@
+"""Single-flight update engine for the SSH integration"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class UpdateEngine:
+    """Coalesce concurrent refresh requests into one in-flight execution"""
+
+    def __init__(self, name: str, update_method: Callable[[], Awaitable[Any]]) -> None:
+        """Initialize the engine"""
+        self.name = name
+        self._update_method = update_method
+        self._in_flight: asyncio.Future | None = None
+        self.executions = 0
+        self.coalesced = 0
+
+    async def async_refresh(self) -> Any:
+        """Run the update, or join the one already in flight"""
+        if self._in_flight is not None and not self._in_flight.done():
+            self.coalesced += 1
+            _LOGGER.debug("Coalesced refresh for %s (%s total)", self.name, self.coalesced)
+        else:
+            self.executions += 1
+            self._in_flight = asyncio.ensure_future(self._update_method())
+
+        # Shielded so one caller being cancelled does not cancel the shared run
+        return await asyncio.shield(self._in_flight)
+
+    def async_cancel(self) -> None:
+        """Cancel the run in flight, closing its channel"""
+        if self._in_flight is not None and not self._in_flight.done():
+            self._in_flight.cancel()
+
+    def as_dict(self) -> dict[str, int]:
+        return {"executions": self.executions, "coalesced": self.coalesced}
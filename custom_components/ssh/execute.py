@@ -0,0 +1,90 @@
+"""Ad-hoc commands across many hosts for the SSH integration"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, dataclass
+import logging
+import time
+from typing import Any
+
+import async_timeout
+
+from .pool import SSHConnectionPool
+from .transport import SSHConnection
+
+_LOGGER = logging.getLogger(__name__)
+
+# Stats for every ad-hoc command are kept together instead of one entry each
+EXECUTE_LABEL = "<execute>"
+
+
+@dataclass
+class ExecuteResult:
+    """Outcome of the command on one target"""
+    host: str
+    stdout: str = ""
+    stderr: str = ""
+    exit_status: int | None = None
+    truncated: bool = False
+    latency_ms: float | None = None
+    error: str | None = None
+
+
+async def async_execute(
+    pool: SSHConnectionPool,
+    command: str,
+    targets: dict[str, SSHConnection],
+    max_parallel: int,
+    timeout: float,
+) -> dict[str, Any]:
+    """Run a command on every target's connection at once, within one deadline
+
+    Targets sharing a connection share one run. At most max_parallel runs are
+    in flight at a time, and whatever has not finished when the deadline
+    passes is cancelled and reported as timed out. The caller's references
+    on the connections are released here.
+    """
+    start = time.monotonic()
+    semaphore = asyncio.Semaphore(max_parallel)
+    connections = {connection.key: connection for connection in targets.values()}
+
+    async def async_run(connection: SSHConnection) -> ExecuteResult:
+        result = ExecuteResult(connection.name)
+        try:
+            # Waiting for a free slot counts against the deadline too
+            async with async_timeout.timeout(max(timeout - (time.monotonic() - start), 0)):
+                async with semaphore:
+                    run_start = time.monotonic()
+                    output = await connection.async_run(command, label=EXECUTE_LABEL)
+        except asyncio.TimeoutError:
+            result.error = "Timed out"
+        except Exception as err: # Reported for this host only
+            result.error = str(err) or type(err).__name__
+        else:
+            result.stdout = output.stdout
+            result.stderr = output.stderr
+            result.exit_status = output.exit_status
+            result.truncated = output.truncated
+            result.latency_ms = round((time.monotonic() - run_start) * 1000, 1)
+        return result
+
+    try:
+        results = dict(
+            zip(
+                connections,
+                await asyncio.gather(*(async_run(c) for c in connections.values())),
+            )
+        )
+    finally:
+        for connection in targets.values():
+            await pool.async_release(connection)
+
+    failed = sum(result.error is not None for result in results.values())
+    _LOGGER.debug("Ran %s on %s hosts, %s failed", command, len(connections), failed)
+    return {
+        "results": {
+            target: asdict(results[connection.key]) for target, connection in targets.items()
+        },
+        "failed": failed,
+        "elapsed_ms": round((time.monotonic() - start) * 1000, 1),
+    }
@@ -0,0 +1,94 @@
+"""Compiled value extractors for the SSH integration"""
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.backports.enum import StrEnum
+from homeassistant.helpers.typing import ConfigType
+
+from .const import (
+    CONF_VALUE_FIELD,
+    CONF_VALUE_JSON_PATH,
+    CONF_VALUE_REGEX,
+    CONF_VALUE_SEPARATOR,
+    CONF_VALUE_TYPE,
+)
+from .source import JsonPathSelector, RegexSelector, Selector, SourceOutput
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ValueType(StrEnum):
+    """What to cast the extracted value to"""
+    STRING = "string"
+    INT = "int"
+    FLOAT = "float"
+
+
+def _to_int(text: str) -> int:
+    try:
+        return int(text)
+    except ValueError: # Such as "42.0"
+        return int(float(text))
+
+
+_CASTS = {ValueType.STRING: str, ValueType.INT: _to_int, ValueType.FLOAT: float}
+
+
+class ValueExtractor:
+    """Pull a value out of command output without rendering a template
+
+    Built once at setup. The configured steps run in order: the JSON path or
+    regex, then the field, then the cast. A step that finds nothing gives None.
+    """
+
+    def __init__(
+        self,
+        selector: Selector | None = None,
+        field: int | None = None,
+        separator: str | None = None,
+        value_type: ValueType = ValueType.STRING,
+    ) -> None:
+        """Initialize the extractor"""
+        self._selector = selector
+        self._field = field
+        self._separator = separator
+        self._cast = _CASTS[value_type]
+
+    def extract(self, text: str | None) -> Any:
+        """Extract the value from one run's output"""
+        if text is None:
+            return None
+        if self._selector is not None:
+            if (text := SourceOutput(text).select(self._selector)) is None:
+                return None
+        if self._field is not None:
+            fields = text.strip().split(self._separator)
+            try:
+                text = fields[self._field]
+            except IndexError:
+                return None
+        try:
+            return self._cast(text.strip())
+        except (ValueError, OverflowError): # Not a number, or inf as an int
+            _LOGGER.debug("Cannot convert %r to a number", text)
+            return None
+
+
+def extractor_from_config(config: ConfigType) -> ValueExtractor | None:
+    """Build the extractor for an entity, None when it uses no extractor options"""
+    selector: Selector | None = None
+    if (path := config.get(CONF_VALUE_JSON_PATH)) is not None:
+        selector = JsonPathSelector(path)
+    elif (pattern := config.get(CONF_VALUE_REGEX)) is not None:
+        selector = RegexSelector(pattern)
+    field = config.get(CONF_VALUE_FIELD)
+    if selector is None and field is None and CONF_VALUE_TYPE not in config:
+        return None
+    return ValueExtractor(
+        selector,
+        field,
+        config.get(CONF_VALUE_SEPARATOR),
+        ValueType(config.get(CONF_VALUE_TYPE, ValueType.STRING)),
+    )
@@ -0,0 +1,114 @@
+"""Remote file reads over SFTP for the SSH integration"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import BATCH_WINDOW
+from .reader import OutputCapture
+from .transport import FileRead, FileRequest, SSHConnection
+
+_LOGGER = logging.getLogger(__name__)
+
+_PendingRead = tuple[str, float | None, OutputCapture, asyncio.Future[str]]
+
+
+class FileBatcher:
+    """Gather file reads due for one host in the same tick and do them over one SFTP session
+
+    Remembers each file's last stat and contents, so files that have not
+    changed since are served from memory after a stat.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        connection: SSHConnection,
+        window: float = BATCH_WINDOW,
+    ) -> None:
+        """Initialize the batcher"""
+        self.hass = hass
+        self._connection = connection
+        self.window = window
+        self._pending: list[_PendingRead] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._last: dict[tuple[str, OutputCapture], FileRead] = {}
+        self.batches = 0
+        self.reads = 0
+        self.skipped = 0
+
+    async def async_read(
+        self, path: str, timeout: float | None = None, capture: OutputCapture | None = None
+    ) -> str:
+        """Queue a file for the next batch and wait for its contents"""
+        future: asyncio.Future[str] = self.hass.loop.create_future()
+        self._pending.append((path, timeout, capture or OutputCapture(), future))
+        if self._flush_handle is None:
+            self._flush_handle = self.hass.loop.call_later(self.window, self._flush)
+        return await future
+
+    @callback
+    def _flush(self) -> None:
+        self._flush_handle = None
+        pending, self._pending = self._pending, []
+        self.hass.async_create_task(self._async_execute(pending))
+
+    async def _async_execute(self, pending: list[_PendingRead]) -> None:
+        # Sensors reading the same file the same way share one read
+        keys = list(dict.fromkeys((path, capture) for path, _, capture, _ in pending))
+        requests = [
+            FileRequest(path, capture, self._last.get((path, capture))) for path, capture in keys
+        ]
+        timeouts = [timeout for _, timeout, _, _ in pending]
+        # The batch gets the most generous deadline of the reads it carries
+        timeout = None if None in timeouts else max(timeouts)
+        self.batches += 1
+        try:
+            results = await self._connection.async_read_files(requests, timeout)
+        except Exception as err: # Every waiter sees the same failure
+            for *_, future in pending:
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        contents: dict[tuple[str, OutputCapture], str | Exception] = {}
+        skipped = 0
+        for key, request, result in zip(keys, requests, results):
+            if isinstance(result, Exception):
+                self._last.pop(key, None)
+                contents[key] = result
+                continue
+            if result.text is None: # Unchanged, keep what was read before
+                skipped += 1
+                result.text = request.previous.text
+            else:
+                self.reads += 1
+            self._last[key] = result
+            contents[key] = result.text
+        self.skipped += skipped
+        _LOGGER.debug(
+            "Read %s of %s files on %s, the rest were unchanged",
+            len(requests) - skipped,
+            len(requests),
+            self._connection.name,
+        )
+
+        for path, _, capture, future in pending:
+            if future.done():
+                continue
+            if isinstance(content := contents[(path, capture)], Exception):
+                future.set_exception(content)
+            else:
+                future.set_result(content)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop a scheduled flush when the connection goes away"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for *_, future in self._pending:
+            future.cancel()
+        self._pending = []
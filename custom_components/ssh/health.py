@@ -0,0 +1,106 @@
+"""Connection health tracking for the SSH integration"""
+from __future__ import annotations
+
+import logging
+import random
+import time
+
+from homeassistant.backports.enum import StrEnum
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import BACKOFF_MAX, BACKOFF_MIN, CIRCUIT_FAILURE_THRESHOLD
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ConnectionState(StrEnum):
+    """States of a pooled connection"""
+    CONNECTING = "connecting"
+    READY = "ready"
+    DEGRADED = "degraded"
+    OPEN_CIRCUIT = "open_circuit"
+
+
+class CommandSkippedError(HomeAssistantError):
+    """Raised for commands that were not run, through no fault of the host"""
+
+
+class CircuitOpenError(CommandSkippedError):
+    """Raised instead of contacting a host whose circuit is open"""
+
+
+class ConnectionHealth:
+    """Circuit breaker with exponential backoff for one connection
+
+    A host that fails CIRCUIT_FAILURE_THRESHOLD times in a row opens the
+    circuit. Requests then fail fast until the backoff expires, when exactly
+    one probe is let through; its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialize the health tracker"""
+        self.name = name
+        self.state = ConnectionState.CONNECTING
+        self.failures = 0
+        self.reconnects = 0
+        self._retry_at = 0.0
+        self._probing = False
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until the next probe is allowed"""
+        return max(self._retry_at - time.monotonic(), 0.0)
+
+    def check(self) -> None:
+        """Raise if the circuit is open and no probe is due"""
+        if self.state != ConnectionState.OPEN_CIRCUIT:
+            return
+        if self._probing or time.monotonic() < self._retry_at:
+            raise CircuitOpenError(
+                f"Circuit open for {self.name}, next attempt in {self.retry_in:.0f}s"
+            )
+        self._probing = True
+        _LOGGER.debug("Probing %s", self.name)
+
+    def record_connecting(self) -> None:
+        """Note that a new transport is being opened"""
+        if self.state == ConnectionState.READY:
+            self.reconnects += 1
+        if self.state != ConnectionState.OPEN_CIRCUIT:
+            self.state = ConnectionState.CONNECTING
+
+    def record_success(self) -> None:
+        if self.state == ConnectionState.OPEN_CIRCUIT:
+            _LOGGER.info("%s is reachable again", self.name)
+        self.state = ConnectionState.READY
+        self.failures = 0
+        self._probing = False
+
+    def record_cancelled(self) -> None:
+        """Let another probe through if the one in flight was cancelled"""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.failures < CIRCUIT_FAILURE_THRESHOLD:
+            self.state = ConnectionState.DEGRADED
+            return
+
+        # Full jitter keeps hosts that went down together from retrying in lockstep
+        backoff = min(BACKOFF_MAX, BACKOFF_MIN * 2 ** (self.failures - CIRCUIT_FAILURE_THRESHOLD))
+        backoff = random.uniform(backoff / 2, backoff)
+        self._retry_at = time.monotonic() + backoff
+        if self.state != ConnectionState.OPEN_CIRCUIT:
+            _LOGGER.warning(
+                "%s failed %s times in a row, pausing requests", self.name, self.failures
+            )
+        self.state = ConnectionState.OPEN_CIRCUIT
+
+    def as_dict(self) -> dict[str, str | int | float]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "reconnects": self.reconnects,
+            "retry_in": round(self.retry_in, 1),
+        }
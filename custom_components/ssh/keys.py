@@ -0,0 +1,72 @@
+"""Private key store for the SSH integration"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any
+
+import paramiko
+
+from homeassistant.core import HomeAssistant
+
+from .const import BACKEND_ASYNCSSH
+
+try:
+    import asyncssh
+except ImportError: # Optional, paramiko is used when asyncssh is unavailable
+    asyncssh = None
+
+_LOGGER = logging.getLogger(__name__)
+
+# Tried in order until one parses, so the key type never needs configuring
+PARAMIKO_KEY_CLASSES = (paramiko.Ed25519Key, paramiko.ECDSAKey, paramiko.RSAKey)
+
+
+def _load_paramiko_key(path: str) -> paramiko.PKey:
+    for key_class in PARAMIKO_KEY_CLASSES:
+        try:
+            return key_class.from_private_key_file(path)
+        except paramiko.SSHException:
+            continue
+    raise paramiko.SSHException(f"Unsupported or invalid private key: {path}")
+
+
+class KeyStore:
+    """Parse each private key file once and share it between connections
+
+    Keys are cached by path and backend, and re-read only when the file's
+    mtime changes. get() is the only entry point and blocks, so connections
+    call it from a worker thread (paramiko) or the executor (asyncssh).
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the key store"""
+        self.hass = hass
+        self._keys: dict[tuple[str, str], tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, path: str, backend: str) -> Any:
+        """Get the parsed key for a backend, loading it if the file changed"""
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            _LOGGER.error("SSH Key Not Found: %s", path)
+            raise
+
+        with self._lock:
+            cached = self._keys.get((path, backend))
+            if cached is not None and cached[0] == mtime:
+                self.hits += 1
+                return cached[1]
+
+            if backend == BACKEND_ASYNCSSH and asyncssh is not None:
+                key = asyncssh.read_private_key(path)
+            else:
+                key = _load_paramiko_key(path)
+            self._keys[(path, backend)] = (mtime, key)
+            self.loads += 1
+            _LOGGER.debug("Loaded SSH key %s for %s", path, backend)
+            return key
@@ -0,0 +1,66 @@
+"""Known hosts store for the SSH integration"""
+from __future__ import annotations
+
+import logging
+import threading
+
+import paramiko
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import KNOWN_HOSTS_FILE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HostKeyChangedError(HomeAssistantError):
+    """Raised when a known host presents a different key than it did before"""
+
+
+def host_key_name(host: str, port: int) -> str:
+    """Name a host the way OpenSSH known_hosts files do"""
+    return host if port == 22 else f"[{host}]:{port}"
+
+
+class KnownHostsStore:
+    """Host keys trusted on first use, kept in the config directory
+
+    The file uses the OpenSSH known_hosts format, so a host whose key changed
+    on purpose is trusted again by deleting its line. Reading and saving
+    block, so they must run in a worker thread.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store, the file is read on first use"""
+        self.path = hass.config.path(KNOWN_HOSTS_FILE)
+        self._host_keys: paramiko.HostKeys | None = None
+        self._lock = threading.Lock()
+        self.learned = 0
+
+    def _load(self) -> paramiko.HostKeys:
+        """Read the file once, callers must hold the lock"""
+        if self._host_keys is None:
+            self._host_keys = paramiko.HostKeys()
+            try:
+                self._host_keys.load(self.path)
+            except FileNotFoundError:
+                pass
+        return self._host_keys
+
+    def get(self, host: str, port: int) -> dict[str, paramiko.PKey]:
+        """Get the trusted keys of a host by key type, empty if it is new"""
+        with self._lock:
+            return dict(self._load().lookup(host_key_name(host, port)) or {})
+
+    def learn(self, host: str, port: int, key: paramiko.PKey) -> None:
+        """Trust a new host's key from now on"""
+        name = host_key_name(host, port)
+        with self._lock:
+            host_keys = self._load()
+            if host_keys.lookup(name): # Learned through another connection meanwhile
+                return
+            host_keys.add(name, key.get_name(), key)
+            host_keys.save(self.path)
+            self.learned += 1
+        _LOGGER.info("Trusting %s host key of %s from now on", key.get_name(), name)
@@ -0,0 +1,155 @@
+"""Performance instrumentation for the SSH integration"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+import time
+from typing import Any
+
+from homeassistant.backports.enum import StrEnum
+
+from .const import LATENCY_BUCKETS, MAX_COMMAND_STATS
+
+
+class Phase(StrEnum):
+    """Timed steps of connecting and running a command"""
+
+    CONNECT = "connect" # TCP connect
+    KEX = "kex" # Key exchange, up to the server proving its host key
+    AUTH = "auth" # Authentication, after key exchange
+    CHANNEL_OPEN = "channel_open"
+    EXEC = "exec" # asyncssh opens the channel and execs in one step, timed here
+    FIRST_BYTE = "first_byte" # From exec until the first byte of output
+    READ = "read" # From exec until reading finished
+    EXECUTOR_WAIT = "executor_wait" # Queued for a worker thread, paramiko only
+    SESSION_WAIT = "session_wait" # Queued behind max_sessions other channels
+
+
+class LatencyHistogram:
+    """Fixed bucket latency histogram, cheap enough to update on every command"""
+
+    def __init__(self) -> None:
+        """Initialize the histogram"""
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1) # Last bucket is overflow
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        milliseconds = seconds * 1000
+        self.buckets[bisect_left(LATENCY_BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def percentile(self, percent: float) -> float | None:
+        """Upper bound in milliseconds of the bucket holding the percentile"""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                bound = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else self.max
+                return min(bound, round(self.max, 1))
+        return round(self.max, 1)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 1) if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max, 1),
+            "buckets": {
+                **{f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS, self.buckets)},
+                "inf": self.buckets[-1],
+            },
+        }
+
+
+class CommandStats:
+    """Runs, failures and latency of one command on one host"""
+
+    def __init__(self) -> None:
+        """Initialize the stats"""
+        self.latency = LatencyHistogram()
+        self.failures = 0
+        self.timeouts = 0
+        self.bytes_read = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "latency": self.latency.as_dict(),
+            "total_ms": round(self.latency.total, 1),
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "bytes_read": self.bytes_read,
+        }
+
+
+class ConnectionMetrics:
+    """Latency of each phase and totals for one pooled connection
+
+    Updated from worker threads as well as the event loop. Counts may be off
+    by one under contention, which is fine for diagnostics.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the metrics"""
+        self.latency = LatencyHistogram() # Every command end to end, as seen by callers
+        self.phases = {phase: LatencyHistogram() for phase in Phase}
+        self.commands: dict[str, CommandStats] = {}
+        self.connections = 0
+        self.timeouts = 0
+        self.bytes_read = 0
+
+    def record(self, phase: Phase, seconds: float) -> None:
+        self.phases[phase].record(seconds)
+
+    @contextmanager
+    def time(self, phase: Phase) -> Iterator[None]:
+        """Record how long the block took, if it completes"""
+        start = time.monotonic()
+        yield
+        self.record(phase, time.monotonic() - start)
+
+    def command(self, command: str) -> CommandStats | None:
+        """Get the stats for a command, None once too many distinct commands are tracked"""
+        if (stats := self.commands.get(command)) is None:
+            if len(self.commands) >= MAX_COMMAND_STATS:
+                return None
+            stats = self.commands[command] = CommandStats()
+        return stats
+
+    def summary(self) -> dict[str, Any]:
+        """Percentiles only, small enough for state attributes"""
+        return {
+            "connections": self.connections,
+            "timeouts": self.timeouts,
+            "bytes_read": self.bytes_read,
+            **{
+                f"{name}_p{percent}_ms": histogram.percentile(percent)
+                for name, histogram in (("latency", self.latency), *self.phases.items())
+                for percent in (50, 99)
+                if histogram.count
+            },
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "connections": self.connections,
+            "timeouts": self.timeouts,
+            "bytes_read": self.bytes_read,
+            "latency": self.latency.as_dict(),
+            "phases": {phase.value: histogram.as_dict() for phase, histogram in self.phases.items()},
+            # Slowest overall first, to show which commands dominate poll time
+            "commands": {
+                command: stats.as_dict()
+                for command, stats in sorted(
+                    self.commands.items(), key=lambda item: item[1].latency.total, reverse=True
+                )
+            },
+        }
@@ -0,0 +1,341 @@
+"""Shared SSH connection pool for the SSH integration"""
+from __future__ import annotations
+
+import logging
+from typing import Any, NamedTuple
+
+from homeassistant.const import (
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    EVENT_HOMEASSISTANT_CLOSE,
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.typing import ConfigType
+
+from .batch import CommandBatcher
+from .const import (
+    CONF_CIPHERS,
+    CONF_COMPRESSION,
+    CONF_HOST_KEY_ALGORITHMS,
+    CONF_JUMP_HOST,
+    CONF_JUMP_KEY,
+    CONF_JUMP_PASSWORD,
+    CONF_JUMP_PORT,
+    CONF_JUMP_USERNAME,
+    CONF_KEY,
+    CONF_KEX_ALGORITHMS,
+    CONF_MACS,
+    CONF_WORKER_PER_HOST,
+    CONF_WORKER_QUEUE,
+    CONF_WORKERS,
+    DATA_CONFIG,
+    DATA_POOL,
+    DEFAULT_BACKEND,
+    DEFAULT_MAX_SESSIONS,
+    DEFAULT_WORKER_QUEUE,
+    DEFAULT_WORKERS,
+    DOMAIN,
+    WORKER_THREAD_PREFIX,
+)
+from .files import FileBatcher
+from .keys import KeyStore
+from .known_hosts import KnownHostsStore
+from .transport import SSHConnection, create_connection
+from .warmup import ConnectionWarmUp
+from .workers import SSHWorkerPool
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SecurityOptions(NamedTuple):
+    """Algorithms to offer in order of preference, empty for the backend's defaults"""
+    kex: tuple[str, ...] = ()
+    ciphers: tuple[str, ...] = ()
+    macs: tuple[str, ...] = ()
+    host_keys: tuple[str, ...] = ()
+    compression: bool | None = None # None keeps the backend's default
+
+
+def security_from_config(config: ConfigType) -> SecurityOptions:
+    """Build the algorithm preferences for an entity"""
+    return SecurityOptions(
+        tuple(config.get(CONF_KEX_ALGORITHMS, ())),
+        tuple(config.get(CONF_CIPHERS, ())),
+        tuple(config.get(CONF_MACS, ())),
+        tuple(config.get(CONF_HOST_KEY_ALGORITHMS, ())),
+        config.get(CONF_COMPRESSION),
+    )
+
+
+class JumpHost(NamedTuple):
+    """Bastion to reach a host through"""
+    host: str
+    port: int
+    username: str | None
+    key_file: str | None
+    password: str | None
+
+
+def jump_from_config(config: ConfigType) -> JumpHost | None:
+    """Build the jump host for an entity, borrowing its login where none is given"""
+    if (host := config.get(CONF_JUMP_HOST)) is None:
+        return None
+    key_file = config.get(CONF_JUMP_KEY)
+    password = config.get(CONF_JUMP_PASSWORD)
+    if key_file is None and password is None:
+        key_file = config.get(CONF_KEY)
+        password = config.get(CONF_PASSWORD)
+    return JumpHost(
+        host,
+        config[CONF_JUMP_PORT],
+        config.get(CONF_JUMP_USERNAME, config.get(CONF_USERNAME)),
+        key_file,
+        password,
+    )
+
+
+class ConnectionKey(NamedTuple):
+    """Identity of a pooled connection"""
+    host: str
+    port: int
+    username: str | None
+    credential: str | None # Password if provided, otherwise the key path
+    backend: str = DEFAULT_BACKEND
+    agent: bool = False
+    security: SecurityOptions = SecurityOptions()
+    jump: ConnectionKey | None = None # Connection the host is reached through
+
+
+class SSHConnectionPool:
+    """Reference counted connections keyed by host, port, username and credential"""
+
+    def __init__(self, hass: HomeAssistant, config: dict[str, Any]) -> None:
+        """Initialize the pool"""
+        self.hass = hass
+        self._connections: dict[ConnectionKey, SSHConnection] = {}
+        self._batchers: dict[ConnectionKey, CommandBatcher] = {}
+        self._action_batchers: dict[ConnectionKey, CommandBatcher] = {}
+        self._file_batchers: dict[ConnectionKey, FileBatcher] = {}
+        self._entities: dict[str, SSHConnection] = {}
+        self.keys = KeyStore(hass)
+        self.known_hosts = KnownHostsStore(hass)
+        self.warm_up = ConnectionWarmUp(hass)
+        self._max_workers = config.get(CONF_WORKERS, DEFAULT_WORKERS)
+        self._max_queue = config.get(CONF_WORKER_QUEUE, DEFAULT_WORKER_QUEUE)
+        self._worker_per_host = config.get(CONF_WORKER_PER_HOST, False)
+        self.workers = SSHWorkerPool(WORKER_THREAD_PREFIX, self._max_workers, self._max_queue)
+        self._host_workers: dict[ConnectionKey, SSHWorkerPool] = {}
+
+    def _get_workers(self, key: ConnectionKey) -> SSHWorkerPool:
+        """Get the shared workers, or with worker_per_host the host's own single worker
+
+        A single thread per host runs its calls in order and on the same
+        thread, and keeps the total at one thread per host.
+        """
+        if not self._worker_per_host:
+            return self.workers
+        if (workers := self._host_workers.get(key)) is None:
+            workers = self._host_workers[key] = SSHWorkerPool(
+                f"{WORKER_THREAD_PREFIX}_{key.host}_{key.port}", 1, self._max_queue
+            )
+        return workers
+
+    @callback
+    def async_acquire(
+        self,
+        host: str,
+        port: int,
+        username: str | None,
+        key_file: str | None,
+        password: str | None,
+        backend: str = DEFAULT_BACKEND,
+        use_agent: bool = False,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        security: SecurityOptions = SecurityOptions(),
+        jump: JumpHost | None = None,
+        shell: bool = False,
+    ) -> SSHConnection:
+        """Get the shared connection for a host, creating it if needed
+
+        Keys are not read here, they are loaded through the key store off the
+        event loop the first time the connection is opened. The connection
+        keeps the lowest max_sessions any of its users asked for, capped at the
+        host's single thread with worker_per_host, and uses a persistent shell
+        if any of them asked for one. Hosts behind the same jump host share
+        one connection to it, held until the last of them is released.
+        """
+        jump_key = None
+        if jump is not None:
+            jump_key = ConnectionKey(
+                jump.host,
+                jump.port,
+                jump.username,
+                jump.password or jump.key_file,
+                backend,
+                use_agent,
+            )
+        key = ConnectionKey(
+            host, port, username, password or key_file, backend, use_agent, security, jump_key
+        )
+        if (connection := self._connections.get(key)) is None:
+            connection = create_connection(
+                self.hass,
+                key,
+                key_file,
+                password,
+                self.keys,
+                self.known_hosts,
+                self._get_workers(key),
+            )
+            if jump is not None:
+                connection.jump = self.async_acquire(
+                    jump.host, jump.port, jump.username, jump.key_file, jump.password,
+                    backend, use_agent,
+                )
+            connection.max_sessions = max_sessions
+            self._connections[key] = connection
+            self.warm_up.async_add(connection)
+        connection.max_sessions = min(connection.max_sessions, max_sessions)
+        if self._worker_per_host and connection.workers is not None:
+            # Commands beyond the host's threads would wait in the queue, using up their deadline
+            connection.max_sessions = min(connection.max_sessions, connection.workers.max_workers)
+        connection.shell = connection.shell or shell
+        connection.refs += 1
+        return connection
+
+    @callback
+    def async_get_batcher(self, connection: SSHConnection) -> CommandBatcher:
+        """Get the command batcher for a pooled connection"""
+        if (batcher := self._batchers.get(connection.key)) is None:
+            batcher = self._batchers[connection.key] = CommandBatcher(self.hass, connection)
+        return batcher
+
+    @callback
+    def async_get_action_batcher(
+        self, connection: SSHConnection, window: float
+    ) -> CommandBatcher:
+        """Get the batcher that combines switch actions sent to a host in quick succession
+
+        Kept apart from the polling batcher so actions are never held back by,
+        or bundled with, state polls. The shortest window asked for wins.
+        """
+        if (batcher := self._action_batchers.get(connection.key)) is None:
+            batcher = self._action_batchers[connection.key] = CommandBatcher(
+                self.hass, connection, window
+            )
+        batcher.window = min(batcher.window, window)
+        return batcher
+
+    @callback
+    def async_get_file_batcher(self, connection: SSHConnection) -> FileBatcher:
+        """Get the batcher that reads files due on a host over its SFTP session"""
+        if (batcher := self._file_batchers.get(connection.key)) is None:
+            batcher = self._file_batchers[connection.key] = FileBatcher(self.hass, connection)
+        return batcher
+
+    @callback
+    def async_register_entity(self, entity_id: str, connection: SSHConnection) -> CALLBACK_TYPE:
+        """Let services reach a host through one of its entities, until the returned callback runs"""
+        self._entities[entity_id] = connection
+
+        @callback
+        def async_unregister() -> None:
+            if self._entities.get(entity_id) is connection:
+                del self._entities[entity_id]
+
+        return async_unregister
+
+    @callback
+    def async_acquire_entity(self, entity_id: str) -> SSHConnection | None:
+        """Take a reference on an entity's connection, None if it is not an SSH entity"""
+        if (connection := self._entities.get(entity_id)) is not None:
+            connection.refs += 1
+        return connection
+
+    async def async_release(self, connection: SSHConnection) -> None:
+        """Drop a reference, closing the connection once the last user is gone"""
+        connection.refs -= 1
+        if connection.refs > 0:
+            return
+        if self._connections.get(connection.key) is connection:
+            del self._connections[connection.key]
+            self.warm_up.async_cancel(connection)
+            for batchers in (self._batchers, self._action_batchers, self._file_batchers):
+                if (batcher := batchers.pop(connection.key, None)) is not None:
+                    batcher.async_cancel()
+        await connection.async_close()
+        if connection.jump is not None:
+            await self.async_release(connection.jump)
+        if (workers := self._host_workers.get(connection.key)) is not None:
+            if connection.key not in self._connections: # Not reopened while closing
+                del self._host_workers[connection.key]
+                workers.shutdown()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Every pooled connection's health and metrics, without credentials"""
+        return {
+            "connections": [
+                {
+                    **connection.as_dict(),
+                    **{
+                        name: {"batches": batcher.batches, "commands": batcher.commands}
+                        for name, batchers in (
+                            ("batcher", self._batchers),
+                            ("action_batcher", self._action_batchers),
+                        )
+                        if (batcher := batchers.get(key)) is not None
+                    },
+                    **(
+                        {
+                            "file_batcher": {
+                                "batches": file_batcher.batches,
+                                "reads": file_batcher.reads,
+                                "skipped": file_batcher.skipped,
+                            }
+                        }
+                        if (file_batcher := self._file_batchers.get(key)) is not None
+                        else {}
+                    ),
+                }
+                for key, connection in self._connections.items()
+            ],
+            "keys": {"loads": self.keys.loads, "hits": self.keys.hits},
+            "known_hosts": {"path": self.known_hosts.path, "learned": self.known_hosts.learned},
+            "startup": self.warm_up.as_dict(),
+            "workers": {
+                workers.name: workers.as_dict()
+                for workers in (self.workers, *self._host_workers.values())
+            },
+        }
+
+    async def async_close(self, *args) -> None:
+        """Close every pooled connection"""
+        connections = list(self._connections.values())
+        self._connections.clear()
+        for batchers in (self._batchers, self._action_batchers, self._file_batchers):
+            for batcher in batchers.values():
+                batcher.async_cancel()
+            batchers.clear()
+        for connection in connections:
+            await connection.async_close()
+
+    @callback
+    def async_shutdown_workers(self, *args) -> None:
+        """Stop the worker threads, after every connection had the chance to close"""
+        for workers in (self.workers, *self._host_workers.values()):
+            workers.shutdown()
+        self._host_workers.clear()
+
+
+@callback
+def async_get_pool(hass: HomeAssistant) -> SSHConnectionPool:
+    """Get the connection pool shared by the switch and sensor platforms"""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (pool := domain_data.get(DATA_POOL)) is None:
+        pool = domain_data[DATA_POOL] = SSHConnectionPool(hass, domain_data.get(DATA_CONFIG, {}))
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, pool.async_close)
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, pool.async_shutdown_workers)
+        async_at_started(hass, pool.warm_up.async_report)
+    return pool
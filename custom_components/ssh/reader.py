@@ -0,0 +1,107 @@
+"""Bounded, incremental command output reader for the SSH integration"""
+from __future__ import annotations
+
+import codecs
+from dataclasses import dataclass
+import re
+import time
+
+from homeassistant.backports.enum import StrEnum
+from homeassistant.helpers.typing import ConfigType
+
+from .const import CONF_CAPTURE, CONF_CAPTURE_REGEX, CONF_MAX_OUTPUT, DEFAULT_MAX_OUTPUT
+
+
+class CaptureMode(StrEnum):
+    """Which part of the output to keep"""
+    HEAD = "head"
+    TAIL = "tail"
+    REGEX = "regex"
+
+
+@dataclass(frozen=True)
+class OutputCapture:
+    """How much of a command's output to keep, and which part"""
+    max_bytes: int = DEFAULT_MAX_OUTPUT
+    mode: CaptureMode = CaptureMode.HEAD
+    pattern: re.Pattern[str] | None = None
+
+    def reader(self) -> OutputReader:
+        """Create a reader for one run of the command"""
+        return OutputReader(self)
+
+    def apply(self, text: str) -> tuple[str, bool]:
+        """Apply the capture to output that is already in memory"""
+        reader = self.reader()
+        reader.feed(text.encode())
+        return reader.result(), reader.truncated
+
+
+def capture_from_config(config: ConfigType) -> OutputCapture:
+    """Build the capture settings for an entity"""
+    if (pattern := config.get(CONF_CAPTURE_REGEX)) is not None:
+        return OutputCapture(config[CONF_MAX_OUTPUT], CaptureMode.REGEX, pattern)
+    return OutputCapture(config[CONF_MAX_OUTPUT], CaptureMode(config[CONF_CAPTURE]))
+
+
+class OutputReader:
+    """Consume output in chunks, holding at most max_bytes at any time
+
+    feed() returns True once the capture is complete, so the caller can stop
+    reading and close the channel instead of draining the rest.
+    """
+
+    def __init__(self, capture: OutputCapture) -> None:
+        """Initialize the reader"""
+        self._capture = capture
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._parts: list[str] = []
+        self._tail = bytearray()
+        self._window = ""
+        self._match: str | None = None
+        self.bytes_read = 0
+        self.first_read: float | None = None # Monotonic time the first chunk arrived
+        self.truncated = False
+        self.done = False
+
+    def feed(self, data: bytes) -> bool:
+        """Take the next chunk, returning True when nothing more is needed"""
+        if self.done:
+            return True
+        if self.first_read is None:
+            self.first_read = time.monotonic()
+        self.bytes_read += len(data)
+        capture = self._capture
+
+        if capture.mode == CaptureMode.TAIL:
+            self._tail += data
+            if len(self._tail) > capture.max_bytes:
+                del self._tail[: len(self._tail) - capture.max_bytes]
+                self.truncated = True
+            return False
+
+        if capture.mode == CaptureMode.REGEX:
+            window = self._window + self._decoder.decode(data)
+            if match := capture.pattern.search(window):
+                self._match = match.group(1) if capture.pattern.groups else match.group(0)
+                self.done = True
+            # Keep a rolling window so a match split across chunks is still found
+            self._window = window[-capture.max_bytes :]
+            return self.done
+
+        remaining = capture.max_bytes - (self.bytes_read - len(data))
+        if len(data) > remaining: # Only truncated once a byte past the limit arrives
+            data = data[:remaining]
+            self.truncated = self.done = True
+        self._parts.append(self._decoder.decode(data, final=self.done))
+        return self.done
+
+    def result(self) -> str:
+        """The captured text"""
+        if self._capture.mode == CaptureMode.TAIL:
+            return bytes(self._tail).decode(errors="ignore" if self.truncated else "replace")
+        if self._capture.mode == CaptureMode.REGEX:
+            return self._match or ""
+        if not self.done:
+            self._parts.append(self._decoder.decode(b"", final=True))
+        return "".join(self._parts)
@@ -0,0 +1,151 @@
+"""Central, jittered and adaptive poll scheduling for the SSH integration"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+import logging
+import random
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import (
+    DATA_SCHEDULER,
+    DOMAIN,
+    POLL_BACKOFF,
+    POLL_JITTER,
+    POLL_TIGHTEN,
+    STARTUP_SPREAD,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Returns True when the output changed, False when it did not, None if unknown
+PollMethod = Callable[[], Awaitable[bool | None]]
+
+
+class _PollJob:
+    """One entity's (or shared source's) recurring poll"""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        poll: PollMethod,
+        interval: timedelta,
+        min_interval: timedelta | None,
+        max_interval: timedelta | None,
+    ) -> None:
+        """Initialize the job"""
+        self.hass = hass
+        self.name = name
+        self._poll = poll
+        self.interval = interval.total_seconds()
+        self._min = (min_interval or interval).total_seconds()
+        self._max = (max_interval or interval).total_seconds()
+        self._handle: asyncio.TimerHandle | None = None
+        self._task: asyncio.Task | None = None
+        self.polls = 0
+
+    @callback
+    def async_start(self) -> None:
+        # Spread the first polls so a restart does not fire every entity at once
+        self._schedule(random.uniform(0, min(self.interval, STARTUP_SPREAD)))
+
+    @callback
+    def async_cancel(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @callback
+    def _schedule(self, delay: float) -> None:
+        self._handle = self.hass.loop.call_later(delay, self._fire)
+
+    @callback
+    def _fire(self) -> None:
+        self._handle = None
+        self._task = self.hass.async_create_background_task(self._async_run(), self.name)
+
+    async def _async_run(self) -> None:
+        changed = None
+        try:
+            changed = await self._poll()
+        except Exception: # Keep polling, like a time interval listener would
+            _LOGGER.exception("Error polling %s", self.name)
+        self.polls += 1
+        self._task = None
+        self._adapt(changed)
+        self._schedule(self.interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER))
+
+    def _adapt(self, changed: bool | None) -> None:
+        """Poll less often while output is stable and more often while it changes"""
+        if changed is None or self._min == self._max:
+            return
+        factor = POLL_TIGHTEN if changed else POLL_BACKOFF
+        interval = min(self._max, max(self._min, self.interval * factor))
+        if interval != self.interval:
+            _LOGGER.debug("Polling %s every %.1fs", self.name, interval)
+        self.interval = interval
+
+
+class PollScheduler:
+    """Run every poll of both platforms from one place"""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler"""
+        self.hass = hass
+        self._jobs: set[_PollJob] = set()
+
+    @callback
+    def async_add(
+        self,
+        name: str,
+        poll: PollMethod,
+        interval: timedelta,
+        min_interval: timedelta | None = None,
+        max_interval: timedelta | None = None,
+    ) -> CALLBACK_TYPE:
+        """Start polling, returning a callback that stops it
+
+        With min_interval or max_interval the interval adapts between them,
+        based on whether the poll reported changed output.
+        """
+        job = _PollJob(self.hass, name, poll, interval, min_interval, max_interval)
+        self._jobs.add(job)
+        job.async_start()
+
+        @callback
+        def remove_job() -> None:
+            job.async_cancel()
+            self._jobs.discard(job)
+
+        return remove_job
+
+    @callback
+    def async_stop(self, *args) -> None:
+        """Stop every poll"""
+        for job in self._jobs:
+            job.async_cancel()
+        self._jobs.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "jobs": len(self._jobs),
+            "intervals": {job.name: round(job.interval, 1) for job in self._jobs},
+        }
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> PollScheduler:
+    """Get the scheduler shared by the switch and sensor platforms"""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (scheduler := domain_data.get(DATA_SCHEDULER)) is None:
+        scheduler = domain_data[DATA_SCHEDULER] = PollScheduler(hass)
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, scheduler.async_stop)
+    return scheduler
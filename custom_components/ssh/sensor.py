@@ -1,13 +1,15 @@
+import hashlib
 import logging
 import voluptuous as vol
 from datetime import timedelta
 import asyncio
-import paramiko
+from collections.abc import Callable
 from typing import Final
 
 from homeassistant.components.sensor import (
     CONF_STATE_CLASS,
     PLATFORM_SCHEMA,
+    SensorEntity,
     SensorStateClass
 )
 
@@ -24,8 +26,11 @@ from homeassistant.const import (
     CONF_SCAN_INTERVAL,
     CONF_FRIENDLY_NAME,
     CONF_PASSWORD,
+    CONF_PATH,
+    EntityCategory,
+    UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.template_entity import (
@@ -37,6 +42,66 @@ from homeassistant.helpers.template import Template
 from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.exceptions import PlatformNotReady, ConfigEntryAuthFailed, ConfigEntryNotReady
 
+from .batch import CommandBatcher
+from .files import FileBatcher
+from .const import (
+    BACKENDS,
+    CONF_BACKEND,
+    CONF_BATCH,
+    CONF_CAPTURE,
+    CONF_CAPTURE_REGEX,
+    CONF_CIPHERS,
+    CONF_COMMAND_TIMEOUT,
+    CONF_COMPRESSION,
+    CONF_DEADBAND,
+    CONF_DIAGNOSTICS,
+    CONF_HOST_KEY_ALGORITHMS,
+    CONF_JUMP_HOST,
+    CONF_JUMP_KEY,
+    CONF_JUMP_PASSWORD,
+    CONF_JUMP_PORT,
+    CONF_JUMP_USERNAME,
+    CONF_KEX_ALGORITHMS,
+    CONF_MACS,
+    CONF_MAX_OUTPUT,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MAX_SESSIONS,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_MIN_WRITE_INTERVAL,
+    CONF_SHELL,
+    CONF_SOURCE_JSON_PATH,
+    CONF_SOURCE_REGEX,
+    CONF_USE_AGENT,
+    CONF_VALUE_FIELD,
+    CONF_VALUE_JSON_PATH,
+    CONF_VALUE_REGEX,
+    CONF_VALUE_SEPARATOR,
+    CONF_VALUE_TYPE,
+    CONF_WATCH,
+    DATA_DIAGNOSTIC_SENSORS,
+    DEFAULT_BACKEND,
+    DEFAULT_MAX_OUTPUT,
+    DEFAULT_MAX_SESSIONS,
+    DOMAIN,
+)
+from .change import ChangeDetector, async_track_detector
+from .engine import UpdateEngine
+from .extract import ValueExtractor, ValueType, extractor_from_config
+from .health import CommandSkippedError
+from .pool import (
+    ConnectionKey,
+    JumpHost,
+    SecurityOptions,
+    async_get_pool,
+    jump_from_config,
+    security_from_config,
+)
+from .reader import CaptureMode, OutputCapture, capture_from_config
+from .scheduler import async_get_scheduler
+from .source import Selector, SSHSource, async_get_source, selector_from_config
+from .stream import SSHWatcher
+from .transport import SSHConnection
+
 _LOGGER = logging.getLogger(__name__)
 
 # DEFAULT VALUES
@@ -45,11 +110,11 @@ DEFAULT_SSH_PORT = 22
 DEFAULT_KEY = '/config/alcazar-switch'
 DEFAULT_USERNAME = 'cumulus'
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=60)
-CONF_COMMAND_TIMEOUT = 30
+DEFAULT_TIMEOUT = 30
 
 CONF_KEY: Final = "key"
 
-PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
+PLATFORM_SCHEMA = vol.All(PLATFORM_SCHEMA.extend(
     {
         vol.Required(CONF_HOST): cv.string,
         vol.Optional(CONF_PORT, default=DEFAULT_SSH_PORT): cv.port,
@@ -57,12 +122,47 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
         vol.Optional(CONF_USERNAME, default=DEFAULT_USERNAME): cv.string,
         vol.Optional(CONF_NAME): cv.string,
         vol.Optional(CONF_KEY, default=DEFAULT_KEY): cv.string,
-        vol.Optional(CONF_COMMAND): cv.string,
+        vol.Exclusive(CONF_COMMAND, "input"): cv.string,
+        vol.Exclusive(CONF_PATH, "input"): cv.string,
         vol.Optional(CONF_UNIQUE_ID): cv.string,
         vol.Optional(CONF_FRIENDLY_NAME): cv.string,
         vol.Optional(CONF_PASSWORD): cv.string,
+        vol.Optional(CONF_COMMAND_TIMEOUT, default=DEFAULT_TIMEOUT): cv.positive_int,
+        vol.Optional(CONF_BACKEND, default=DEFAULT_BACKEND): vol.In(BACKENDS),
+        vol.Optional(CONF_USE_AGENT, default=False): cv.boolean,
+        vol.Optional(CONF_BATCH, default=False): cv.boolean,
+        vol.Optional(CONF_MAX_OUTPUT, default=DEFAULT_MAX_OUTPUT): cv.positive_int,
+        vol.Optional(CONF_CAPTURE, default=CaptureMode.HEAD): vol.In(
+            [CaptureMode.HEAD, CaptureMode.TAIL]
+        ),
+        vol.Optional(CONF_CAPTURE_REGEX): cv.is_regex,
+        vol.Optional(CONF_WATCH, default=False): cv.boolean,
+        vol.Optional(CONF_DEADBAND): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_MIN_WRITE_INTERVAL): cv.time_period,
+        vol.Exclusive(CONF_SOURCE_JSON_PATH, "source"): cv.string,
+        vol.Exclusive(CONF_SOURCE_REGEX, "source"): cv.is_regex,
+        vol.Optional(CONF_DIAGNOSTICS, default=False): cv.boolean,
+        vol.Optional(CONF_MIN_SCAN_INTERVAL): cv.time_period,
+        vol.Optional(CONF_MAX_SCAN_INTERVAL): cv.time_period,
+        vol.Optional(CONF_MAX_SESSIONS, default=DEFAULT_MAX_SESSIONS): cv.positive_int,
+        vol.Optional(CONF_SHELL, default=False): cv.boolean,
+        vol.Optional(CONF_KEX_ALGORITHMS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_CIPHERS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_MACS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_HOST_KEY_ALGORITHMS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_COMPRESSION): cv.boolean,
+        vol.Optional(CONF_JUMP_HOST): cv.string,
+        vol.Optional(CONF_JUMP_PORT, default=22): cv.port,
+        vol.Optional(CONF_JUMP_USERNAME): cv.string,
+        vol.Exclusive(CONF_JUMP_KEY, "jump_credential"): cv.string,
+        vol.Exclusive(CONF_JUMP_PASSWORD, "jump_credential"): cv.string,
+        vol.Exclusive(CONF_VALUE_JSON_PATH, "value"): cv.string,
+        vol.Exclusive(CONF_VALUE_REGEX, "value"): cv.is_regex,
+        vol.Optional(CONF_VALUE_FIELD): vol.Coerce(int),
+        vol.Optional(CONF_VALUE_SEPARATOR): cv.string,
+        vol.Optional(CONF_VALUE_TYPE): vol.In([value_type.value for value_type in ValueType]),
     }
-).extend(TEMPLATE_SENSOR_BASE_SCHEMA.schema)
+).extend(TEMPLATE_SENSOR_BASE_SCHEMA.schema), cv.has_at_least_one_key(CONF_COMMAND, CONF_PATH))
 
 async def async_setup_platform(
     hass: HomeAssistant,
@@ -79,12 +179,13 @@ async def async_setup_platform(
         sensor_config = discovery_info
     
     name: str = sensor_config.get(CONF_NAME) or sensor_config.get(CONF_FRIENDLY_NAME)
-    command: str = sensor_config[CONF_COMMAND]
+    command: str | None = sensor_config.get(CONF_COMMAND)
+    path: str | None = sensor_config.get(CONF_PATH)
     unit: str | None = sensor_config.get(CONF_UNIT_OF_MEASUREMENT)
     value_template: Template | None = sensor_config.get(CONF_VALUE_TEMPLATE)
     if value_template:
         value_template.hass = hass
-    command_timeout: int = CONF_COMMAND_TIMEOUT
+    command_timeout: int = sensor_config.get(CONF_COMMAND_TIMEOUT)
     unique_id: str | None = sensor_config.get(CONF_UNIQUE_ID)
     scan_interval: timedelta = sensor_config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
     state_class: SensorStateClass | None = sensor_config.get(CONF_STATE_CLASS)
@@ -93,15 +194,52 @@ async def async_setup_platform(
     key: str = sensor_config.get(CONF_KEY)
     port: int = sensor_config.get(CONF_PORT)
     password: str = sensor_config.get(CONF_PASSWORD)
+    backend: str = sensor_config.get(CONF_BACKEND)
+    use_agent: bool = sensor_config.get(CONF_USE_AGENT)
+    batch: bool = sensor_config.get(CONF_BATCH)
+    capture: OutputCapture = capture_from_config(sensor_config)
+    selector: Selector | None = selector_from_config(sensor_config)
+    watch: bool = sensor_config.get(CONF_WATCH)
+    deadband: float | None = sensor_config.get(CONF_DEADBAND)
+    min_write_interval: timedelta | None = sensor_config.get(CONF_MIN_WRITE_INTERVAL)
+    diagnostics: bool = sensor_config.get(CONF_DIAGNOSTICS)
+    min_scan_interval: timedelta | None = sensor_config.get(CONF_MIN_SCAN_INTERVAL)
+    max_scan_interval: timedelta | None = sensor_config.get(CONF_MAX_SCAN_INTERVAL)
+    max_sessions: int = sensor_config.get(CONF_MAX_SESSIONS)
+    shell: bool = sensor_config.get(CONF_SHELL)
+    security: SecurityOptions = security_from_config(sensor_config)
+    jump: JumpHost | None = jump_from_config(sensor_config)
+    extractor: ValueExtractor | None = extractor_from_config(sensor_config)
 
-    data = SSHData(hass,
-        command,
-        command_timeout,
+    pool = async_get_pool(hass)
+    connection = pool.async_acquire(
         host,
+        port,
         username,
         key,
-        port,
         password,
+        backend,
+        use_agent,
+        max_sessions,
+        security,
+        jump,
+        shell,
+    )
+    batcher = pool.async_get_batcher(connection) if batch else None
+    files = pool.async_get_file_batcher(connection) if path is not None else None
+    source = None
+    if selector is not None and command is not None: # Share one poll with other entities
+        source = async_get_source(hass, connection, command, command_timeout, capture, batcher)
+    data = SSHData(hass,
+        command,
+        command_timeout,
+        connection,
+        capture,
+        batcher,
+        source,
+        selector,
+        files,
+        path,
     )
 
     trigger_entity_config = {
@@ -110,21 +248,31 @@ async def async_setup_platform(
         CONF_DEVICE_CLASS: sensor_config.get(CONF_DEVICE_CLASS),
     }
     
-    try:
-        async_add_entities(
-            [
-                SSHSensor(
-                    hass,
-                    unique_id,
-                    data,
-                    trigger_entity_config,
-                    unit,
-                    state_class,
-                    value_template,
-                    scan_interval,
-                )
-            ]
+    entities: list[SensorEntity] = [
+        SSHSensor(
+            hass,
+            unique_id,
+            data,
+            trigger_entity_config,
+            unit,
+            state_class,
+            value_template,
+            scan_interval,
+            watch and command is not None,
+            ChangeDetector(deadband, min_write_interval),
+            min_scan_interval,
+            max_scan_interval,
+            extractor,
         )
+    ]
+    diagnostic_sensors: set = hass.data[DOMAIN].setdefault(DATA_DIAGNOSTIC_SENSORS, set())
+    diagnostic_id = _diagnostic_unique_id(connection.key)
+    if diagnostics and diagnostic_id not in diagnostic_sensors: # One per host
+        diagnostic_sensors.add(diagnostic_id)
+        entities.append(SSHDiagnosticSensor(connection, scan_interval, diagnostic_id))
+
+    try:
+        async_add_entities(entities)
     except ConnectionError as err:
         raise PlatformNotReady(f"Connection error while connecting to {name}") from err
     except ConfigEntryAuthFailed as err:
@@ -136,7 +284,7 @@ async def async_setup_platform(
 
 class SSHSensor(TemplateSensor):
     """SSH Sensor Class"""
-    _attr_should_poll = True
+    _attr_should_poll = False
 
     def __init__(
         self,
@@ -148,6 +296,11 @@ class SSHSensor(TemplateSensor):
         state_class: SensorStateClass | None,
         value_template: Template | None,
         scan_interval: timedelta,
+        watch: bool = False,
+        change: ChangeDetector | None = None,
+        min_scan_interval: timedelta | None = None,
+        max_scan_interval: timedelta | None = None,
+        extractor: ValueExtractor | None = None,
     ) -> None:
         """Initialize the sensor"""
         super().__init__(hass, config=config, unique_id=unique_id, fallback_name=DEFAULT_NAME)
@@ -155,120 +308,261 @@ class SSHSensor(TemplateSensor):
         self._attr_extra_state_attributes = {}
         self._attr_native_value = None
         self._value_template = value_template
+        self._extractor = extractor
         self._attr_native_unit_of_measurement = unit_of_measurement
         self._attr_state_class = state_class
         self._scan_interval = scan_interval
+        self._min_scan_interval = min_scan_interval
+        self._max_scan_interval = max_scan_interval
+        self._watch = watch
+        self._change = change or ChangeDetector()
         self._process_updates: asyncio.Lock | None = None
         self._run_updates: bool = True
 
-    @property
-    def native_value(self):
-        return self.data.value
-
     async def async_added_to_hass(self) -> None:
         """Call when entity about to be added to hass"""
         await super().async_added_to_hass()
-        await self._update_entity_state()
+        # Lets the execute service target this entity's host
         self.async_on_remove(
-            async_track_time_interval(
-                self.hass,
+            async_get_pool(self.hass).async_register_entity(self.entity_id, self.data.connection)
+        )
+        self.async_on_remove(async_track_detector(self.hass, self.entity_id, self._change))
+        if self._watch: # Lines are pushed as they arrive, no polling needed
+            watcher = self.data.async_watch(self._async_handle_value)
+            self.async_on_remove(watcher.async_stop)
+            return
+        if self.data.source is not None: # Polled once for every entity sharing the command
+            self.async_on_remove(
+                self.data.async_subscribe(self._async_handle_value, self._scan_interval)
+            )
+            return
+
+        self.async_on_remove(
+            async_get_scheduler(self.hass).async_add(
+                f"SSH Sensor - {self.name}",
                 self._update_entity_state,
                 self._scan_interval,
-                name=f"SSH Sensor - {self.name}",
-                cancel_on_shutdown=True,
-            ),
+                self._min_scan_interval,
+                self._max_scan_interval,
+            )
         )
 
-    async def _update_entity_state(self, *args) -> None:
-        """Update the state of the entity"""
+    async def async_will_remove_from_hass(self) -> None:
+        """Release the shared connection when the entity is removed"""
+        await super().async_will_remove_from_hass()
+        await self.data.async_release()
+
+    def add_to_platform_abort(self) -> None:
+        """Release the shared connection when the platform rejects the entity"""
+        hass = self.hass
+        super().add_to_platform_abort()
+        # Never added, so async_will_remove_from_hass will not run
+        hass.async_create_task(self.data.async_release())
+
+    async def _update_entity_state(self, *args) -> bool | None:
+        """Update the state of the entity, returning whether the output changed"""
         if self._run_updates:
-            asyncio.create_task(asyncio.to_thread(self.async_update))
-            await self.hass.async_add_executor_job(self.data.update)
-            self.async_write_ha_state()
+            if not await self.data.async_update(): # Failed or skipped
+                return None # Says nothing about whether the output is stable
+            return self._async_handle_value()
         else:
-            return
+            return None
 
     async def async_update(self) -> None:
-        await self.hass.async_add_executor_job(self.data.update)
+        await self.data.async_update()
+        self._async_handle_value()
+
+    @callback
+    def _async_handle_value(self) -> bool:
+        """Render the latest value and write the state if it changed
 
+        Returns whether the output changed, which the scheduler adapts to.
+        """
+        if not self._change.changed(self.data.value): # Same output, nothing to render
+            return False
+
+        value = self.data.value
+        if self._extractor is not None: # Compiled at setup, no template needed
+            value = self._extractor.extract(value)
         if self._value_template:
-            self._attr_native_value = (
-                self._value_template.async_render_with_possible_json_value(
-                    self.data.value,
-                    None,
-                )
+            value = self._value_template.async_render_with_possible_json_value(
+                value if value is None else str(value),
+                None,
             )
-        else: # No template provided
-            self._attr_native_value = self.data.value
 
+        if self._change.should_write(value):
+            self._attr_native_value = value
+            self.async_write_ha_state()
+        return True
+
+def _diagnostic_unique_id(key: ConnectionKey) -> str:
+    """Unique id of a connection's diagnostic sensor, which leaves credentials out
+
+    Connections that differ only by algorithms, agent or jump host get a
+    digest of those appended. Plain connections keep the id they always had.
+    """
+
+    def without_credentials(key: ConnectionKey) -> ConnectionKey:
+        jump = without_credentials(key.jump) if key.jump is not None else None
+        return key._replace(credential=None, jump=jump)
+
+    unique_id = f"ssh_diagnostics_{key.username}@{key.host}:{key.port}_{key.backend}"
+    if key.security == SecurityOptions() and not key.agent and key.jump is None:
+        return unique_id
+    digest = hashlib.blake2b(repr(without_credentials(key)).encode(), digest_size=8)
+    return f"{unique_id}_{digest.hexdigest()}"
+
+
+class SSHDiagnosticSensor(SensorEntity):
+    """Command latency and connection health of one host"""
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self, connection: SSHConnection, scan_interval: timedelta, unique_id: str
+    ) -> None:
+        """Initialize the sensor"""
+        self._connection = connection
+        self._scan_interval = scan_interval
+        self._attr_name = f"SSH {connection.name} Latency"
+        self._attr_unique_id = unique_id
+
+    async def async_added_to_hass(self) -> None:
+        """Call when entity about to be added to hass"""
+        self._async_update_metrics()
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass,
+                self._async_update_metrics,
+                self._scan_interval,
+                name=f"SSH Diagnostics - {self._connection.name}",
+                cancel_on_shutdown=True,
+            ),
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Let another sensor on the host add the diagnostics again"""
+        self.hass.data[DOMAIN][DATA_DIAGNOSTIC_SENSORS].discard(self.unique_id)
+
+    def add_to_platform_abort(self) -> None:
+        """Let another sensor on the host add the diagnostics when this one is rejected"""
+        self.hass.data[DOMAIN][DATA_DIAGNOSTIC_SENSORS].discard(self.unique_id)
+        super().add_to_platform_abort()
+
+    @callback
+    def _async_update_metrics(self, *args) -> None:
+        """Show the median command latency, with the rest as attributes"""
+        metrics = self._connection.metrics
+        self._attr_native_value = metrics.latency.percentile(50)
+        self._attr_extra_state_attributes = {
+            **self._connection.health.as_dict(),
+            **metrics.summary(),
+        }
+        if (workers := self._connection.workers) is not None:
+            self._attr_extra_state_attributes.update(
+                workers_active=workers.active,
+                workers_queued=workers.queued,
+                workers_rejected=workers.rejected,
+                workers_saturated=workers.saturated,
+            )
         self.async_write_ha_state()
 
+
 class SSHData:
     def __init__(
         self, 
         hass: HomeAssistant,
-        command: str,
+        command: str | None,
         command_timeout: int,
-        host: str,
-        username: str,
-        key: str,
-        port: int,
-        password: str,
+        connection: SSHConnection,
+        capture: OutputCapture,
+        batcher: CommandBatcher | None = None,
+        source: SSHSource | None = None,
+        selector: Selector | None = None,
+        files: FileBatcher | None = None,
+        path: str | None = None,
     ) -> None:
         """Initialize the data object"""
         self.value: str | None = None
         self.hass = hass
         self.command = command
         self.timeout = command_timeout
-        self._host = host
-        self._port = port
-        self._connected = False
-        self._key = key
-        self._ssh = None
-        self._username = username
-        self._password = password
-
-        # Create ssh private key
-        if not self._password: # Using private key instead of password
-            try:
-                self._ssh_key = paramiko.Ed25519Key.from_private_key_file(self._key)
-            except FileNotFoundError as err:
-                _LOGGER.error("SSH Key Not Found...")
-
-    def _connect(self):
-        try:
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            if self._password: # Password provided, use this instead of the private key
-                client.connect(self._host, port=self._port, username=self._username, password=self._password)
-            else: # Use private key instead
-                client.connect(self._host, port=self._port, username=self._username, pkey=self._ssh_key)
-            self._ssh = client
-            self._connected = True
-        except Exception as err:
-            _LOGGER.error(f"Failed to Connect SSH Error: {str(err)}")
+        self._connection = connection
+        self._batcher = batcher
+        self._capture = capture
+        self.source = source
+        self._selector = selector
+        self._files = files
+        self.path = path
+        self.engine = UpdateEngine(command or path, self._async_update)
 
-    def _disconnect(self):
-        """Disconnect the SSH connection"""
-        try:
-            self._ssh.logout()
-        except Exception:
-            pass
-        finally:
-            self._ssh = None
-            self._connected = False
-
-    def update(self) -> None:
-        """Get the latest data with the specified command"""
-        try:
-            if not self._connected:
-                self._connect()
+    @property
+    def connection(self) -> SSHConnection:
+        """The pooled connection this entity's commands run on"""
+        return self._connection
+
+    async def async_release(self) -> None:
+        """Cancel any command in flight and release the pooled connection"""
+        self.engine.async_cancel()
+        await async_get_pool(self.hass).async_release(self._connection)
+
+    @callback
+    def async_watch(self, on_update: Callable[[], None]) -> SSHWatcher:
+        """Stream the command's output, updating the value on every line"""
+
+        @callback
+        def handle_line(line: str) -> None:
+            self.value = line
+            on_update()
+
+        watcher = SSHWatcher(
+            self.hass, self._connection, self.command, self.timeout, handle_line
+        )
+        watcher.async_start()
+        return watcher
+
+    @callback
+    def async_subscribe(
+        self, on_update: Callable[[], None], interval: timedelta
+    ) -> CALLBACK_TYPE:
+        """Follow the shared source, selecting this sensor's value from every poll"""
+
+        @callback
+        def handle_output() -> None:
+            self.value = self.source.output.select(self._selector)
+            on_update()
+
+        return self.source.async_add_listener(handle_output, interval)
+
+    async def async_update(self) -> bool:
+        """Get the latest data, sharing any run already in flight
 
-            # NOTE: There are some cases where we still haven't connected at this point
-            #       Because the scan interval is small, it will just fail to fetch once, and catch on the next cycle
-            _, stdout, _ = self._ssh.exec_command(self.command, self.timeout)
+        Returns whether new data arrived, False if the update failed or was skipped.
+        """
+        if self.source is not None:
+            return await self.source.async_refresh() is not None
+        return await self.engine.async_refresh()
+
+    async def _async_update(self) -> bool:
+        """Get the latest data with the specified command or file"""
+        try:
+            if self._files is not None: # Read with the host's other files over SFTP
+                self.value = await self._files.async_read(self.path, self.timeout, self._capture)
+                return True
+            # Each command gets its own channel on the host's shared transport,
+            # or shares one with the other commands due this tick when batching
+            result = await (self._batcher or self._connection).async_run(
+                self.command, self.timeout, self._capture
+            )
             
-            self.value = stdout.read().decode()
+            self.value = result.stdout
+        except CommandSkippedError as err: # Skip quietly, host down, released or busy
+            _LOGGER.debug(str(err))
         except Exception as err:
             _LOGGER.error(f"Failed to Update SSH Error: {str(err)}")
-        
\ No newline at end of file
+        else:
+            return True
+        return False
+        
@@ -0,0 +1,105 @@
+"""Framing for commands sent to a persistent remote shell for the SSH integration"""
+from __future__ import annotations
+
+from uuid import uuid4
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .reader import OutputReader
+
+
+class ShellClosedError(HomeAssistantError):
+    """Raised when the remote shell exits before a command's output is complete"""
+
+
+class ShellDesyncError(HomeAssistantError):
+    """Raised when the shell's output no longer lines up with the sentinels"""
+
+
+def new_sentinel() -> str:
+    """A marker that cannot occur in any command's own output"""
+    return f"HASS-SSH-{uuid4().hex}"
+
+
+def build_shell_command(command: str, sentinel: str) -> bytes:
+    """Wrap a command for the shell, framing its stdout and stderr with the sentinel
+
+    Both streams start with a begin line and end with the sentinel, and the
+    exit code follows the sentinel on stdout. The subshell keeps an `exit`
+    or `cd` in the command from affecting the shell itself.
+    """
+    return (
+        f"printf '{sentinel}-begin\\n'; printf '{sentinel}-begin\\n' >&2; "
+        f"( {command}\n) </dev/null; rc=$?; "
+        f"printf '\\n{sentinel} %d\\n' $rc; "
+        f"printf '\\n{sentinel}\\n' >&2\n"
+    ).encode()
+
+
+def build_shell_sync(sentinel: str) -> bytes:
+    """Print the sentinel on both streams, to skip what the shell printed before it"""
+    return f"printf '\\n{sentinel} 0\\n'; printf '\\n{sentinel}\\n' >&2\n".encode()
+
+
+class FrameReader:
+    """Feed one stream of a framed command into a reader, up to its sentinel
+
+    Output is passed on as it arrives, holding back only what could be the
+    start of the sentinel. Bytes seen before the begin line are counted in
+    skipped, and anything after the sentinel line is kept in leftover. Both
+    stay empty while the shell is in sync.
+    """
+
+    def __init__(
+        self, sentinel: str, reader: OutputReader | None, exit_status: bool, begin: bool = True
+    ) -> None:
+        """Initialize the frame, a reader of None discards the output"""
+        self._begin = f"{sentinel}-begin\n".encode() if begin else None
+        # The exit code, when there is one, follows the sentinel on the same line
+        self._end = (f"\n{sentinel} " if exit_status else f"\n{sentinel}\n").encode()
+        self.reader = reader
+        self._exit_status = exit_status
+        self._buffer = bytearray()
+        self._found = False
+        self.exit_status: int | None = None
+        self.skipped = 0
+        self.leftover = b""
+        self.done = False
+
+    def _output(self, data: bytes) -> None:
+        if data and self.reader is not None:
+            self.reader.feed(data) # Keeps only what the capture wants, the rest is drained
+
+    def feed(self, data: bytes) -> bool:
+        """Take the next chunk, returning True once the sentinel line is complete"""
+        self._buffer += data
+        if self._begin is not None:
+            if (index := self._buffer.find(self._begin)) < 0:
+                if (drop := len(self._buffer) - len(self._begin) + 1) > 0:
+                    self.skipped += drop
+                    del self._buffer[:drop]
+                return False
+            self.skipped += index
+            del self._buffer[: index + len(self._begin)]
+            self._begin = None
+        if not self._found:
+            if (index := self._buffer.find(self._end)) < 0:
+                if (keep := len(self._buffer) - len(self._end) + 1) > 0:
+                    self._output(bytes(self._buffer[:keep]))
+                    del self._buffer[:keep]
+                return False
+            self._output(bytes(self._buffer[:index]))
+            del self._buffer[: index + len(self._end)]
+            self._found = True
+        if self._exit_status:
+            line, newline, rest = self._buffer.partition(b"\n")
+            if not newline:
+                return False
+            try:
+                self.exit_status = int(line)
+            except ValueError as err:
+                raise ShellDesyncError(f"Unexpected exit code line {bytes(line)!r}") from err
+            self._buffer = bytearray(rest)
+        self.leftover = bytes(self._buffer)
+        self.done = True
+        return True
@@ -0,0 +1,235 @@
+"""Shared command sources for the SSH integration"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import replace
+from datetime import timedelta
+from functools import cached_property
+import json
+import logging
+import re
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util.json import json_loads
+
+from .batch import CommandBatcher
+from .const import CONF_SOURCE_JSON_PATH, CONF_SOURCE_REGEX, DATA_SOURCES, DOMAIN
+from .engine import UpdateEngine
+from .health import CommandSkippedError
+from .reader import OutputCapture
+from .scheduler import async_get_scheduler
+from .transport import SSHConnection
+
+_LOGGER = logging.getLogger(__name__)
+
+_PATH_TOKEN = re.compile(r"([^.\[\]]+)|\[(-?\d+)\]")
+
+
+class JsonPathSelector:
+    """Select a value from JSON output with a dotted path such as ports.swp1[0].poe"""
+
+    def __init__(self, path: str) -> None:
+        """Compile the path"""
+        self.path = path
+        self._keys: list[str | int] = [
+            int(index) if index else key for key, index in _PATH_TOKEN.findall(path)
+        ]
+
+    def select(self, output: SourceOutput) -> str | None:
+        value: Any = output.json
+        for key in self._keys:
+            try:
+                value = value[key]
+            except (KeyError, IndexError, TypeError):
+                return None
+        if value is None or isinstance(value, str):
+            return value
+        return json.dumps(value)
+
+
+class RegexSelector:
+    """Select the first group, or the whole match, of a regular expression"""
+
+    def __init__(self, pattern: re.Pattern[str]) -> None:
+        """Initialize the selector"""
+        self.pattern = pattern
+
+    def select(self, output: SourceOutput) -> str | None:
+        if (match := self.pattern.search(output.text)) is None:
+            return None
+        return match.group(1) if self.pattern.groups else match.group(0)
+
+
+Selector = JsonPathSelector | RegexSelector
+
+
+def selector_from_config(config: ConfigType) -> Selector | None:
+    """Build the selector for an entity that reads from a shared source"""
+    if (path := config.get(CONF_SOURCE_JSON_PATH)) is not None:
+        return JsonPathSelector(path)
+    if (pattern := config.get(CONF_SOURCE_REGEX)) is not None:
+        return RegexSelector(pattern)
+    return None
+
+
+class SourceOutput:
+    """One poll's output, parsed at most once however many entities read it"""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    @cached_property
+    def json(self) -> Any:
+        try:
+            return json_loads(self.text)
+        except ValueError:
+            _LOGGER.debug("Source output is not valid JSON")
+            return None
+
+    def select(self, selector: Selector) -> str | None:
+        return selector.select(self)
+
+
+class SSHSource:
+    """One command polled once per interval on behalf of many entities"""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        connection: SSHConnection,
+        command: str,
+        timeout: float | None,
+        capture: OutputCapture,
+        batcher: CommandBatcher | None,
+    ) -> None:
+        """Initialize the source"""
+        self.hass = hass
+        self.connection = connection
+        self.command = command
+        self.output: SourceOutput | None = None
+        self._timeout = timeout
+        self._capture = capture
+        self._batcher = batcher
+        self.key = _source_key(connection, command, capture, batcher)
+        self._listeners: dict[Callable[[], None], timedelta] = {}
+        self._interval: timedelta | None = None
+        self._unsub_poll: CALLBACK_TYPE | None = None
+        self.engine = UpdateEngine(command, self._async_poll)
+
+    @property
+    def listeners(self) -> int:
+        return len(self._listeners)
+
+    @callback
+    def async_merge(self, timeout: float | None, capture: OutputCapture) -> None:
+        """Widen the poll for another entity, keeping the longest timeout and largest output"""
+        if self._timeout is not None and (timeout is None or timeout > self._timeout):
+            self._timeout = timeout
+        if capture.max_bytes > self._capture.max_bytes:
+            self._capture = replace(self._capture, max_bytes=capture.max_bytes)
+
+    @callback
+    def async_add_listener(
+        self, update_callback: Callable[[], None], interval: timedelta
+    ) -> CALLBACK_TYPE:
+        """Subscribe to new output, polling at least as often as the interval"""
+        self._listeners[update_callback] = interval
+        self._async_schedule()
+        if self.output is not None: # Joined after the first poll
+            update_callback()
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.pop(update_callback, None)
+            self._async_schedule()
+
+        return remove_listener
+
+    @callback
+    def _async_schedule(self) -> None:
+        """Poll at the shortest interval any listener asked for"""
+        interval = min(self._listeners.values(), default=None)
+        if interval == self._interval:
+            return
+        if self._unsub_poll is not None:
+            self._unsub_poll()
+            self._unsub_poll = None
+        self._interval = interval
+        if interval is None: # No listeners left
+            self.engine.async_cancel()
+            _async_remove_source(self.hass, self)
+            return
+        self._unsub_poll = async_get_scheduler(self.hass).async_add(
+            f"SSH Source - {self.connection.name}: {self.command}",
+            self.async_refresh,
+            interval,
+        )
+
+    async def async_refresh(self, *args) -> bool | None:
+        """Poll the command, sharing any run already in flight
+
+        Returns whether the output changed, None if the poll failed.
+        """
+        return await self.engine.async_refresh()
+
+    async def _async_poll(self) -> bool | None:
+        try:
+            result = await (self._batcher or self.connection).async_run(
+                self.command, self._timeout, self._capture
+            )
+        except CommandSkippedError as err: # Skip quietly, host down, released or busy
+            _LOGGER.debug(str(err))
+            return None
+        except Exception as err:
+            _LOGGER.error(f"Failed to Update SSH Source Error: {str(err)}")
+            return None
+
+        changed = self.output is None or self.output.text != result.stdout
+        self.output = SourceOutput(result.stdout)
+        for update_callback in list(self._listeners):
+            update_callback()
+        return changed
+
+
+def _source_key(
+    connection: SSHConnection,
+    command: str,
+    capture: OutputCapture,
+    batcher: CommandBatcher | None,
+) -> tuple:
+    """Entities only share a poll when they capture the same part of the output the same way"""
+    return (connection.key, command, capture.mode, capture.pattern, batcher is not None)
+
+
+@callback
+def async_get_source(
+    hass: HomeAssistant,
+    connection: SSHConnection,
+    command: str,
+    timeout: float | None,
+    capture: OutputCapture,
+    batcher: CommandBatcher | None,
+) -> SSHSource:
+    """Get the shared source for a command on a connection
+
+    Entities with the same capture mode and batching share one poll, which
+    keeps the longest command_timeout and the largest max_output_bytes among them.
+    """
+    sources: dict[tuple, SSHSource] = hass.data.setdefault(DOMAIN, {}).setdefault(
+        DATA_SOURCES, {}
+    )
+    key = _source_key(connection, command, capture, batcher)
+    if (source := sources.get(key)) is None:
+        source = sources[key] = SSHSource(hass, connection, command, timeout, capture, batcher)
+    else:
+        source.async_merge(timeout, capture)
+    return source
+
+
+@callback
+def _async_remove_source(hass: HomeAssistant, source: SSHSource) -> None:
+    sources: dict[tuple, SSHSource] = hass.data[DOMAIN][DATA_SOURCES]
+    if sources.get(source.key) is source:
+        del sources[source.key]
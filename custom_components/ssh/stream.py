@@ -0,0 +1,72 @@
+"""Streaming watch mode for the SSH integration"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import WATCH_RETRY_MAX, WATCH_RETRY_MIN
+from .transport import SSHConnection
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SSHWatcher:
+    """Keep a long-running command open and push each line as it arrives"""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        connection: SSHConnection,
+        command: str,
+        timeout: float | None,
+        on_line: Callable[[str], None],
+    ) -> None:
+        """Initialize the watcher"""
+        self.hass = hass
+        self._connection = connection
+        self._command = command
+        self._timeout = timeout
+        self._on_line = on_line
+        self._task: asyncio.Task | None = None
+        self.lines = 0
+        self.restarts = 0
+
+    @callback
+    def async_start(self) -> None:
+        """Start watching in the background"""
+        self._task = self.hass.async_create_background_task(
+            self._async_run(), f"SSH Watch - {self._connection.name}: {self._command}"
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop watching and close the channel"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _async_run(self) -> None:
+        retry = WATCH_RETRY_MIN
+        while True:
+            try:
+                async for line in self._connection.async_stream(
+                    self._command, self._timeout
+                ):
+                    retry = WATCH_RETRY_MIN # Data is flowing again, reset the backoff
+                    self.lines += 1
+                    self._on_line(line.rstrip("\r\n"))
+                _LOGGER.warning(
+                    "Watch command on %s exited, restarting in %ss", self._connection.name, retry
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                _LOGGER.error(
+                    f"Watch SSH Error on {self._connection.name}: {str(err)}, retrying in {retry}s"
+                )
+            await asyncio.sleep(retry)
+            retry = min(retry * 2, WATCH_RETRY_MAX)
+            self.restarts += 1
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Awaitable, Callable
 from datetime import timedelta
 from typing import TYPE_CHECKING, Any
 import logging
-import paramiko
 from typing import Final
 
 import voluptuous as vol
@@ -31,24 +31,84 @@ from homeassistant.const import (
     CONF_PASSWORD,
 )
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.template import Template
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 from homeassistant.helpers.template_entity import TemplateEntity
 from homeassistant.exceptions import PlatformNotReady, ConfigEntryAuthFailed, ConfigEntryNotReady
 
+from .batch import CommandBatcher, async_run_batch
+from .const import (
+    BACKENDS,
+    CONF_ACTION_WINDOW,
+    CONF_BACKEND,
+    CONF_BATCH,
+    CONF_CAPTURE,
+    CONF_CAPTURE_REGEX,
+    CONF_CIPHERS,
+    CONF_COMMAND_TIMEOUT,
+    CONF_COMPRESSION,
+    CONF_CONFIRM,
+    CONF_HOST_KEY_ALGORITHMS,
+    CONF_JUMP_HOST,
+    CONF_JUMP_KEY,
+    CONF_JUMP_PASSWORD,
+    CONF_JUMP_PORT,
+    CONF_JUMP_USERNAME,
+    CONF_KEX_ALGORITHMS,
+    CONF_MACS,
+    CONF_MAX_OUTPUT,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MAX_SESSIONS,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_SHELL,
+    CONF_STATE_ON,
+    CONF_SOURCE_JSON_PATH,
+    CONF_SOURCE_REGEX,
+    CONF_USE_AGENT,
+    CONF_VALUE_FIELD,
+    CONF_VALUE_JSON_PATH,
+    CONF_VALUE_REGEX,
+    CONF_VALUE_SEPARATOR,
+    CONF_VALUE_TYPE,
+    DEFAULT_BACKEND,
+    DEFAULT_MAX_OUTPUT,
+    DEFAULT_MAX_SESSIONS,
+)
+from .change import ChangeDetector, async_track_detector
+from .engine import UpdateEngine
+from .extract import ValueExtractor, ValueType, extractor_from_config
+from .health import CommandSkippedError
+from .pool import (
+    JumpHost,
+    SecurityOptions,
+    async_get_pool,
+    jump_from_config,
+    security_from_config,
+)
+from .reader import CaptureMode, OutputCapture, capture_from_config
+from .scheduler import async_get_scheduler
+from .source import (
+    Selector,
+    SourceOutput,
+    SSHSource,
+    async_get_source,
+    selector_from_config,
+)
+from .transport import SSHConnection
+
 _LOGGER = logging.getLogger(__name__)
 
 # DEFAULT VALUES
-CONF_COMMAND_TIMEOUT = None
 DEFAULT_TIMEOUT = 60
 DEFAULT_SSH_PORT = 22
 DEFAULT_SCAN_INTERVAL = timedelta(seconds=30)
 SCAN_INTERVAL = timedelta(seconds=30)
 CONF_KEY: Final = "key"
+# Rendered command_state output that means the switch is on, when confirming without state_on
+STATE_ON_VALUES: Final = ("1", "on", "true")
 DEFAULT_KEY = '/config/alcazar-switch'
 
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
@@ -66,6 +126,38 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
         vol.Optional(CONF_USERNAME): cv.string,
         vol.Optional(CONF_KEY, default=DEFAULT_KEY): cv.string,
         vol.Optional(CONF_PASSWORD): cv.string,
+        vol.Optional(CONF_BACKEND, default=DEFAULT_BACKEND): vol.In(BACKENDS),
+        vol.Optional(CONF_USE_AGENT, default=False): cv.boolean,
+        vol.Optional(CONF_BATCH, default=False): cv.boolean,
+        vol.Optional(CONF_ACTION_WINDOW): cv.positive_float,
+        vol.Optional(CONF_CONFIRM, default=False): cv.boolean,
+        vol.Optional(CONF_STATE_ON): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_MAX_OUTPUT, default=DEFAULT_MAX_OUTPUT): cv.positive_int,
+        vol.Optional(CONF_CAPTURE, default=CaptureMode.HEAD): vol.In(
+            [CaptureMode.HEAD, CaptureMode.TAIL]
+        ),
+        vol.Optional(CONF_CAPTURE_REGEX): cv.is_regex,
+        vol.Exclusive(CONF_SOURCE_JSON_PATH, "source"): cv.string,
+        vol.Exclusive(CONF_SOURCE_REGEX, "source"): cv.is_regex,
+        vol.Optional(CONF_MIN_SCAN_INTERVAL): cv.time_period,
+        vol.Optional(CONF_MAX_SCAN_INTERVAL): cv.time_period,
+        vol.Optional(CONF_MAX_SESSIONS, default=DEFAULT_MAX_SESSIONS): cv.positive_int,
+        vol.Optional(CONF_SHELL, default=False): cv.boolean,
+        vol.Optional(CONF_KEX_ALGORITHMS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_CIPHERS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_MACS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_HOST_KEY_ALGORITHMS): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_COMPRESSION): cv.boolean,
+        vol.Optional(CONF_JUMP_HOST): cv.string,
+        vol.Optional(CONF_JUMP_PORT, default=22): cv.port,
+        vol.Optional(CONF_JUMP_USERNAME): cv.string,
+        vol.Exclusive(CONF_JUMP_KEY, "jump_credential"): cv.string,
+        vol.Exclusive(CONF_JUMP_PASSWORD, "jump_credential"): cv.string,
+        vol.Exclusive(CONF_VALUE_JSON_PATH, "value"): cv.string,
+        vol.Exclusive(CONF_VALUE_REGEX, "value"): cv.is_regex,
+        vol.Optional(CONF_VALUE_FIELD): vol.Coerce(int),
+        vol.Optional(CONF_VALUE_SEPARATOR): cv.string,
+        vol.Optional(CONF_VALUE_TYPE): vol.In([value_type.value for value_type in ValueType]),
     }
 )#.extend()
 
@@ -98,18 +190,63 @@ async def async_setup_platform(
     key: str = switch_config.get(CONF_KEY)
     scan_interval: timedelta = switch_config.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
     password: str = switch_config.get(CONF_PASSWORD)
-
+    backend: str = switch_config.get(CONF_BACKEND)
+    use_agent: bool = switch_config.get(CONF_USE_AGENT)
+    batch: bool = switch_config.get(CONF_BATCH)
+    action_window: float | None = switch_config.get(CONF_ACTION_WINDOW)
+    confirm: bool = switch_config.get(CONF_CONFIRM)
+    if confirm and not command_state:
+        _LOGGER.warning(f"SSH Switch {unique_id}: confirm needs command_state, ignoring it")
+        confirm = False
+    state_on: list[str] | None = switch_config.get(CONF_STATE_ON)
+    if state_on is None and confirm: # The confirmed output has to map to a state
+        state_on = list(STATE_ON_VALUES)
+    capture: OutputCapture = capture_from_config(switch_config)
+    selector: Selector | None = selector_from_config(switch_config)
+    min_scan_interval: timedelta | None = switch_config.get(CONF_MIN_SCAN_INTERVAL)
+    max_scan_interval: timedelta | None = switch_config.get(CONF_MAX_SCAN_INTERVAL)
+    max_sessions: int = switch_config.get(CONF_MAX_SESSIONS)
+    shell: bool = switch_config.get(CONF_SHELL)
+    security: SecurityOptions = security_from_config(switch_config)
+    jump: JumpHost | None = jump_from_config(switch_config)
+    extractor: ValueExtractor | None = extractor_from_config(switch_config)
+
+    pool = async_get_pool(hass)
+    connection = pool.async_acquire(
+        host,
+        port,
+        username,
+        key,
+        password,
+        backend,
+        use_agent,
+        max_sessions,
+        security,
+        jump,
+        shell,
+    )
+    batcher = pool.async_get_batcher(connection) if batch else None
+    action_batcher = None
+    if action_window: # Actions to the same host within the window share one invocation
+        action_batcher = pool.async_get_action_batcher(connection, action_window)
+    source = None
+    if selector is not None and command_state: # Share one poll of command_state
+        source = async_get_source(
+            hass, connection, command_state, command_timeout, capture, batcher
+        )
     data = SSHData(
         hass,
         command_on,
         command_off,
         command_state,
         command_timeout,
-        host,
-        username,
-        key,
-        port,
-        password,
+        connection,
+        capture,
+        batcher,
+        source,
+        selector,
+        action_batcher,
+        confirm,
     )
 
     trigger_entity_config = {
@@ -131,6 +268,10 @@ async def async_setup_platform(
                     command_timeout,
                     scan_interval,
                     data,
+                    min_scan_interval,
+                    max_scan_interval,
+                    extractor,
+                    state_on,
                 )
             ]
         )
@@ -157,6 +298,10 @@ class SSHSwitch(TemplateEntity, SwitchEntity):
         command_timeout: int,
         scan_interval: timedelta,
         data: SSHData,
+        min_scan_interval: timedelta | None = None,
+        max_scan_interval: timedelta | None = None,
+        extractor: ValueExtractor | None = None,
+        state_on: list[str] | None = None,
     ) -> None:
         super().__init__(hass, config=config, fallback_name=None, unique_id=object_id)
         self.hass: HomeAssistant = hass
@@ -166,83 +311,115 @@ class SSHSwitch(TemplateEntity, SwitchEntity):
         self._command_off = command_off
         self._command_state = command_state
         self._value_template = value_template
+        self._extractor = extractor
+        # Without it polls leave is_on to the actions, as command_state always did
+        self._state_on = (
+            {value.strip().lower() for value in state_on} if state_on is not None else None
+        )
         self._timeout = command_timeout
         self._scan_interval = scan_interval
+        self._min_scan_interval = min_scan_interval
+        self._max_scan_interval = max_scan_interval
         self._process_updates: asyncio.Lock | None = None
         self._run_updates: bool = True
         self.data = data
+        self._change = ChangeDetector()
         
     async def async_added_to_hass(self) -> None:
         """Called when entity about to be added to hass"""
         await super().async_added_to_hass()
-        if self._command_state:
+        # Lets the execute service target this entity's host
+        self.async_on_remove(
+            async_get_pool(self.hass).async_register_entity(self.entity_id, self.data.connection)
+        )
+        self.async_on_remove(async_track_detector(self.hass, self.entity_id, self._change))
+        if self.data.source is not None: # Polled once for every entity sharing the command
+            self.async_on_remove(
+                self.data.async_subscribe(self._async_handle_value, self._scan_interval)
+            )
+        elif self._command_state:
             self.async_on_remove(
-                async_track_time_interval(
-                    self.hass,
+                async_get_scheduler(self.hass).async_add(
+                    f"SSH Switch - {self.name}",
                     self._update_entity_state,
                     self._scan_interval,
-                    name=f"SSH Switch - {self.name}",
-                    cancel_on_shutdown=True,
-                ),
+                    self._min_scan_interval,
+                    self._max_scan_interval,
+                )
             )
 
-    async def _update_entity_state(self, *args) -> None:
-        """Update the state of the entity"""
-        if self._run_updates:
-            await self.hass.async_add_executor_job(self.data.update)
-            value = self.data.value
-
-            if self._value_template:
-                self._attr_native_value = (
-                    self._value_template.async_render_with_possible_json_value(
-                        value,
-                        None
-                    )
-                )
-            else: # No template provided
-                self._attr_native_value = value
+    async def async_will_remove_from_hass(self) -> None:
+        """Release the shared connection when the entity is removed"""
+        await super().async_will_remove_from_hass()
+        await self.data.async_release()
 
-            self.async_write_ha_state()
+    def add_to_platform_abort(self) -> None:
+        """Release the shared connection when the platform rejects the entity"""
+        hass = self.hass
+        super().add_to_platform_abort()
+        # Never added, so async_will_remove_from_hass will not run
+        hass.async_create_task(self.data.async_release())
 
+    async def _update_entity_state(self, *args) -> bool | None:
+        """Update the state of the entity, returning whether the output changed"""
+        if self._run_updates:
+            if not await self.data.async_update(): # Failed or skipped
+                return None # Says nothing about whether the output is stable
+            return self._async_handle_value()
         else:
-            return
-    
-    async def async_update(self) -> None:
-        await self._update_entity_state()
+            return None
 
-    async def async_turn_on(self, **kwargs: Any) -> None:
-        """Turn the switch on"""
-        await self.hass.async_add_executor_job(self.data.turn_on)
+    @callback
+    def _async_handle_value(self) -> bool:
+        """Render the latest value and write the state if it changed
 
-        self._attr_is_on = True
+        Returns whether the output changed, which the scheduler adapts to.
+        """
+        value = self.data.value
+        if not self._change.changed(value): # Same output, nothing to render
+            return False
 
+        rendered = value
+        if self._extractor is not None: # Compiled at setup, no template needed
+            rendered = self._extractor.extract(rendered)
         if self._value_template:
-            self._attr_native_value = (
-                self._value_template.async_render_with_possible_json_value(
-                    self.data.value,
-                    None
-                )
+            rendered = self._value_template.async_render_with_possible_json_value(
+                rendered if rendered is None else str(rendered),
+                None
             )
-        else: # No template provided
-            self._attr_native_value = self.data.value
+        self._attr_native_value = rendered
 
-        self.async_write_ha_state()
+        if self._state_on is not None and value is not None:
+            self._attr_is_on = str(self._attr_native_value).strip().lower() in self._state_on
+
+        if self._change.should_write(self._attr_native_value):
+            self.async_write_ha_state()
+        return True
+    
+    async def async_update(self) -> None:
+        await self._update_entity_state()
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Turn the switch on"""
+        await self._async_handle_action(self.data.async_turn_on, True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
-        await self.hass.async_add_executor_job(self.data.turn_off)
+        await self._async_handle_action(self.data.async_turn_off, False)
 
-        self._attr_is_on = False
+    async def _async_handle_action(
+        self, action: Callable[[], Awaitable[bool]], is_on: bool
+    ) -> None:
+        """Run an action and show its confirmed state, or assume it if not confirming"""
+        succeeded = await action()
+        if self.data.confirm: # command_state already ran right after the action
+            self._async_handle_value()
+            return
 
-        if self._value_template:
-            self._attr_native_value = (
-                self._value_template.async_render_with_possible_json_value(
-                    self.data.value,
-                    None
-                )
-            )
-        else: # No template provided
-            self._attr_native_value = self.data.value
+        if not succeeded: # Leave the state alone if the command failed
+            return
 
+        self._attr_is_on = is_on
+        self._change.invalidate() # Let the next poll confirm or correct the assumed state
         self.async_write_ha_state()
 
 
@@ -254,89 +431,122 @@ class SSHData:
         command_off: str,
         command_state: str,
         command_timeout: int,
-        host: str,
-        username: str,
-        key: str,
-        port: int,
-        password: str,
+        connection: SSHConnection,
+        capture: OutputCapture,
+        batcher: CommandBatcher | None = None,
+        source: SSHSource | None = None,
+        selector: Selector | None = None,
+        action_batcher: CommandBatcher | None = None,
+        confirm: bool = False,
     ) -> None:
         self.value: str | None = None
         self.hass: HomeAssistant = hass
         self._command_on: str = command_on
         self._command_off: str = command_off
         self._command_state: str = command_state
-        self._host: str = host
-        self._key: str = key
-        self._port: int = port
-        self._ssh = None
-        self._username: str = username
         self._timeout = command_timeout
         self._switch_state = True
-        self._connected = False
-        self._password = password
-
-        if not self._password: # Using private key instead of password
-            try:
-                self._ssh_key = paramiko.Ed25519Key.from_private_key_file(self._key)
-            except FileNotFoundError as err:
-                _LOGGER.error("SSH Key Not Found")
-        
-    def _connect(self):
-        try:
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            if self._password: # Using provided password
-                client.connect(self._host, port=self._port, username=self._username, password=self._password)
-            else: # Using private key
-                client.connect(self._host, port=self._port, username=self._username, pkey=self._ssh_key)
-            self._ssh = client
-            self._connected = True
-        except Exception as err:
-            _LOGGER.error(f"Generic SSH Error: {str(err)}")
-
-    def _disconnect(self):
-        try:
-            self._ssh.logout()
-        except Exception:
-            pass
-        finally:
-            self._ssh = None
-            self._connected = False
-
-    def update(self) -> None:
+        self._connection = connection
+        self._batcher = batcher
+        self._action_batcher = action_batcher
+        self.confirm = confirm
+        self._capture = capture
+        self.source = source
+        self._selector = selector
+        self.engine = UpdateEngine(command_state, self._async_update)
+
+    @property
+    def connection(self) -> SSHConnection:
+        """The pooled connection this entity's commands run on"""
+        return self._connection
+
+    async def async_release(self) -> None:
+        """Cancel any command in flight and release the pooled connection"""
+        self.engine.async_cancel()
+        await async_get_pool(self.hass).async_release(self._connection)
+
+    @callback
+    def async_subscribe(
+        self, on_update: Callable[[], None], interval: timedelta
+    ) -> CALLBACK_TYPE:
+        """Follow the shared source, selecting this switch's value from every poll"""
+
+        @callback
+        def handle_output() -> None:
+            self.value = self.source.output.select(self._selector)
+            on_update()
+
+        return self.source.async_add_listener(handle_output, interval)
+
+    async def async_update(self) -> bool:
+        """Refresh the data, sharing any run already in flight
+
+        Returns whether new data arrived, False if the update failed or was skipped.
+        """
+        if self.source is not None:
+            return await self.source.async_refresh() is not None
+        return await self.engine.async_refresh()
+
+    async def _async_update(self) -> bool:
         """Run the specified command to update the data"""
         try:
-            if not self._connected:
-                self._connect()
-
-            _, stdout, _ = self._ssh.exec_command(self._command_state, self._timeout)
+            result = await (self._batcher or self._connection).async_run(
+                self._command_state, self._timeout, self._capture
+            )
 
-            self.value = stdout.read().decode()
+            self.value = result.stdout
+        except CommandSkippedError as err: # Skip quietly, host down, released or busy
+            _LOGGER.debug(str(err))
         except Exception as err:
             _LOGGER.error(f"Generic SSH Error: {str(err)}")
+        else:
+            return True
+        return False
 
-    def turn_on(self) -> None:
-        """Run the specified payload on command"""
+    async def async_turn_on(self) -> bool:
+        """Run the specified payload on command, returning whether it succeeded"""
+        if not await self._async_run_action(self._command_on):
+            return False
+        self._switch_state = True
+        return True
+
+    async def async_turn_off(self) -> bool:
+        """Run the specified payload off command, returning whether it succeeded"""
+        if not await self._async_run_action(self._command_off):
+            return False
+        self._switch_state = False
+        return True
+
+    async def _async_run_action(self, command: str) -> bool:
+        """Run an on or off command, followed by command_state when confirming
+
+        Both run in the same invocation, so the confirmed state arrives in the
+        same round trip as the action.
+        """
+        commands = [command, self._command_state] if self.confirm else [command]
         try:
-            if not self._connected:
-                self._connect()
-
-            _, _, _ = self._ssh.exec_command(self._command_on, self._timeout)
-
-            self._switch_state = False
-
+            if self._action_batcher is not None:
+                results = await self._action_batcher.async_run_all(
+                    commands, self._timeout, self._capture
+                )
+            elif len(commands) > 1:
+                results = await async_run_batch(
+                    self._connection, commands, self._timeout, [self._capture] * len(commands)
+                )
+            else:
+                results = [
+                    await self._connection.async_run(command, self._timeout, self._capture)
+                ]
         except Exception as err:
             _LOGGER.error(f"Generic SSH Error: {str(err)}")
-
-    def turn_off(self) -> None:
-        """Run the specified payload off command"""
-        try:
-            if not self._connected:
-                self._connect()
-
-            _, _, _ = self._ssh.exec_command(self._command_off, self._timeout)
-
-            self._switch_state = True
-
-        except Exception as err:
-            _LOGGER.error(f"Generic SSH Error: {str(err)}")
\ No newline at end of file
+            return False
+
+        if self.confirm:
+            output = results[1].stdout
+            self.value = SourceOutput(output).select(self._selector) if self._selector else output
+        if results[0].exit_status: # None when the server does not report one
+            _LOGGER.error(
+                f"SSH Command Failed: '{command}' exited with status {results[0].exit_status}"
+            )
+            return False
+        return True
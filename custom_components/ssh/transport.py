@@ -0,0 +1,1196 @@
+"""SSH transport backends for the SSH integration"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass
+import logging
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import async_timeout
+import paramiko
+from paramiko.hostkeys import HostKeyEntry
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    BACKEND_ASYNCSSH,
+    DEFAULT_MAX_SESSIONS,
+    KEEPALIVE_COUNT_MAX,
+    KEEPALIVE_INTERVAL,
+    PROBE_TIMEOUT,
+    PSEUDO_FILESYSTEMS,
+    READ_CHUNK_SIZE,
+)
+from .health import CommandSkippedError, ConnectionHealth, ConnectionState
+from .keys import KeyStore
+from .known_hosts import HostKeyChangedError, KnownHostsStore, host_key_name
+from .metrics import ConnectionMetrics, Phase
+from .reader import OutputCapture, OutputReader
+from .shell import (
+    FrameReader,
+    ShellClosedError,
+    ShellDesyncError,
+    build_shell_command,
+    build_shell_sync,
+    new_sentinel,
+)
+from .workers import SSHWorkerPool
+
+try:
+    import asyncssh
+except ImportError: # Optional, paramiko is used when asyncssh is unavailable
+    asyncssh = None
+
+if TYPE_CHECKING:
+    from .pool import ConnectionKey, SecurityOptions
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class ConnectionClosedError(CommandSkippedError):
+    """Raised for commands still queued when their connection is closed"""
+
+
+@dataclass
+class CommandResult:
+    """Output of a remote command"""
+    stdout: str
+    stderr: str = ""
+    exit_status: int | None = None # None when reading stopped before the command exited
+    truncated: bool = False
+    bytes_read: int = 0 # Received over the wire, before the capture was applied
+
+
+@dataclass
+class FileRead:
+    """Stat of a remote file and, unless it was skipped, its contents"""
+    mtime: int | None
+    size: int | None
+    text: str | None = None # None when skipped because the file had not changed
+    truncated: bool = False
+    bytes_read: int = 0
+
+
+@dataclass
+class FileRequest:
+    """A remote file to read, with what it looked like last time"""
+    path: str
+    capture: OutputCapture
+    previous: FileRead | None = None
+
+    def unchanged(self, mtime: int | None, size: int | None) -> bool:
+        """Whether the read can be skipped because mtime and size are the same
+
+        Never for pseudo filesystems like /proc and /sys, or empty files, as
+        their stat does not follow their contents.
+        """
+        if self.previous is None or not size or self.path.startswith(PSEUDO_FILESYSTEMS):
+            return False
+        return (mtime, size) == (self.previous.mtime, self.previous.size)
+
+
+class Deadline:
+    """Time budget shared by every step of one operation"""
+
+    def __init__(self, timeout: float | None) -> None:
+        self._expires = None if timeout is None else time.monotonic() + timeout
+
+    def remaining(self) -> float | None:
+        """Seconds left, None when there is no deadline"""
+        if self._expires is None:
+            return None
+        if (remaining := self._expires - time.monotonic()) <= 0:
+            raise socket.timeout("Deadline exceeded")
+        return remaining
+
+
+class _Operation:
+    """Handle on a blocking command so the event loop can abort it"""
+
+    def __init__(self) -> None:
+        self.channel: paramiko.Channel | None = None
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Close the channel, which wakes up the worker thread blocked on it"""
+        self.cancelled = True
+        if self.channel is not None:
+            self.channel.close()
+
+
+class SSHConnection(ABC):
+    """One SSH transport shared by every entity talking to the same host"""
+
+    workers: SSHWorkerPool | None = None # Only set for backends that block
+    jump: SSHConnection | None = None # Same backend, set when reached through a jump host
+    shell = False # Run commands in one persistent shell instead of a channel each
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        key: ConnectionKey,
+        key_file: str | None,
+        password: str | None,
+        key_store: KeyStore,
+        known_hosts: KnownHostsStore,
+    ) -> None:
+        """Initialize the connection"""
+        self.hass = hass
+        self.key = key
+        self.refs = 0
+        self.closed = False
+        self.max_sessions = DEFAULT_MAX_SESSIONS
+        self.sessions = 0
+        self._session_available = asyncio.Condition()
+        self._key_file = key_file
+        self._password = password
+        self._key_store = key_store
+        self._known_hosts = known_hosts
+        self.health = ConnectionHealth(self.name)
+        self.metrics = ConnectionMetrics()
+        self.negotiated: dict[str, str | None] = {} # Algorithms agreed on the last connect
+        self._shell_lock = asyncio.Lock()
+        self.shell_starts = 0
+        self.shell_desyncs = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.key.username}@{self.key.host}:{self.key.port}"
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "backend": type(self).__name__,
+            "refs": self.refs,
+            "jump": self.jump.name if self.jump is not None else None,
+            "health": self.health.as_dict(),
+            "negotiated": self.negotiated,
+            "shell": (
+                {"starts": self.shell_starts, "desyncs": self.shell_desyncs}
+                if self.shell
+                else None
+            ),
+            "metrics": self.metrics.as_dict(),
+        }
+
+    def _get_private_key(self) -> Any:
+        """Get the parsed private key to authenticate with, blocking"""
+        if self._password or not self._key_file: # Password provided, no key needed
+            return None
+        try:
+            return self._key_store.get(self._key_file, self.key.backend)
+        except FileNotFoundError:
+            if self.key.agent: # The agent may still hold a usable key
+                return None
+            raise
+
+    def _record_read(self, start: float, stdout: OutputReader, stderr: OutputReader) -> int:
+        """Record first byte and read latency from exec, returning the bytes read"""
+        self.metrics.record(Phase.READ, time.monotonic() - start)
+        first_reads = [first for first in (stdout.first_read, stderr.first_read) if first]
+        if first_reads:
+            self.metrics.record(Phase.FIRST_BYTE, min(first_reads) - start)
+        bytes_read = stdout.bytes_read + stderr.bytes_read
+        self.metrics.bytes_read += bytes_read
+        return bytes_read
+
+    def _record_timeout(self, command: str, timeout: float | None) -> None:
+        self.metrics.timeouts += 1
+        _LOGGER.warning("Timed out after %ss running '%s' on %s", timeout, command, self.name)
+
+    @asynccontextmanager
+    async def _async_session(self) -> AsyncIterator[None]:
+        """Hold one of the host's max_sessions channel slots"""
+        start = time.monotonic()
+        async with self._session_available:
+            # Checked on every wake up, so lowering max_sessions applies straight away
+            await self._session_available.wait_for(
+                lambda: self.closed or self.sessions < self.max_sessions
+            )
+            if self.closed: # Released while queued, do not reconnect
+                raise ConnectionClosedError(f"Connection to {self.name} is closed")
+            self.sessions += 1
+        self.metrics.record(Phase.SESSION_WAIT, time.monotonic() - start)
+        try:
+            yield
+        finally:
+            async with self._session_available:
+                self.sessions -= 1
+                self._session_available.notify()
+
+    async def async_run(
+        self,
+        command: str,
+        timeout: float | None = None,
+        capture: OutputCapture | None = None,
+        label: str | None = None,
+    ) -> CommandResult:
+        """Run a command on its own channel, bounded end to end by the timeout
+
+        Output is read incrementally and only the part selected by the capture
+        is kept. Raises CircuitOpenError without touching the network while the
+        host is considered down. Stats are kept under the label, which defaults
+        to the command itself. In shell mode the command runs in the host's
+        persistent shell instead, taking turns with the host's other commands.
+        """
+        label = label or command
+        run = self._async_shell_run if self.shell else self._async_run
+        # The timeout starts once a channel slot (or the shell) is free, waiting does not use it up
+        result = await self._async_tracked(
+            label,
+            lambda: run(command, timeout, capture or OutputCapture()),
+            session=not self.shell,
+        )
+        if (stats := self.metrics.command(label)) is not None:
+            stats.bytes_read += result.bytes_read
+        return result
+
+    async def async_read_files(
+        self, requests: list[FileRequest], timeout: float | None = None
+    ) -> list[FileRead | Exception]:
+        """Read remote files over the host's shared SFTP session, bounded by the timeout
+
+        Files whose mtime and size match the request's previous read are only
+        stat'ed. A missing or unreadable file gets its exception in place of
+        a result, without failing the others.
+        """
+        results = await self._async_tracked(
+            "<sftp>", lambda: self._async_read_files(requests, timeout)
+        )
+        bytes_read = sum(result.bytes_read for result in results if isinstance(result, FileRead))
+        self.metrics.bytes_read += bytes_read
+        if (stats := self.metrics.command("<sftp>")) is not None:
+            stats.bytes_read += bytes_read
+        return results
+
+    async def _async_tracked(
+        self, label: str, operation: Callable[[], Awaitable[_T]], session: bool = True
+    ) -> _T:
+        """Run an operation in a channel slot, tracking health and latency under the label"""
+        self.health.check()
+        stats = self.metrics.command(label)
+        start = time.monotonic()
+        try:
+            async with self._async_session() if session else nullcontext():
+                result = await operation()
+        except asyncio.CancelledError:
+            self.health.record_cancelled()
+            raise
+        except CommandSkippedError: # Not the host's fault
+            self.health.record_cancelled()
+            raise
+        except Exception as err:
+            if stats is not None:
+                stats.failures += 1
+                if isinstance(err, asyncio.TimeoutError):
+                    stats.timeouts += 1
+            await self._async_handle_failure()
+            raise
+        self.health.record_success()
+        elapsed = time.monotonic() - start
+        self.metrics.latency.record(elapsed)
+        if stats is not None:
+            stats.latency.record(elapsed)
+        return result
+
+    async def _async_shell_run(
+        self, command: str, timeout: float | None, capture: OutputCapture
+    ) -> CommandResult:
+        """Run a command in the persistent shell, starting or restarting it as needed
+
+        A shell that exited since the last command (idle logout, dropped
+        transport) is replaced and the command sent again. A shell left in an
+        unknown state, by a timeout or output that does not line up with the
+        sentinels, is closed so the next command starts a fresh one.
+        """
+        async with self._shell_lock:
+            if self.closed: # Released while waiting for the shell
+                raise ConnectionClosedError(f"Connection to {self.name} is closed")
+            deadline = Deadline(timeout)
+            for retry in (False, True):
+                fresh = not self._shell_alive()
+                sentinel = new_sentinel()
+                stdout = FrameReader(sentinel, capture.reader(), True)
+                stderr = FrameReader(sentinel, OutputCapture(capture.max_bytes).reader(), False)
+                try:
+                    async with async_timeout.timeout(deadline.remaining()):
+                        if fresh:
+                            await self._async_shell_start(deadline)
+                        start = time.monotonic()
+                        await self._async_shell_exchange(
+                            build_shell_command(command, sentinel), stdout, stderr, deadline
+                        )
+                except CommandSkippedError: # Never sent, the shell is as it was
+                    raise
+                except ShellClosedError as err:
+                    await self._async_shell_stop()
+                    if self.closed: # Released mid command, do not reconnect
+                        raise ConnectionClosedError(
+                            f"Connection to {self.name} is closed"
+                        ) from err
+                    if fresh or retry: # Not just a stale shell
+                        raise
+                    _LOGGER.debug("Shell on %s had exited, starting a new one", self.name)
+                    continue
+                except (asyncio.TimeoutError, socket.timeout):
+                    await self._async_shell_stop()
+                    self._record_timeout(command, timeout)
+                    raise asyncio.TimeoutError(
+                        f"Timed out running '{command}' in the shell on {self.name}"
+                    ) from None
+                except ShellDesyncError as err:
+                    self.shell_desyncs += 1
+                    _LOGGER.warning("Shell on %s is out of sync, restarting it: %s", self.name, err)
+                    await self._async_shell_stop()
+                    raise
+                except BaseException: # Cancelled, the shell's state is unknown
+                    await self._async_shell_stop()
+                    raise
+                if stdout.skipped or stderr.skipped or stdout.leftover or stderr.leftover:
+                    self.shell_desyncs += 1
+                    _LOGGER.warning("Shell on %s is out of sync, restarting it", self.name)
+                    await self._async_shell_stop()
+                bytes_read = self._record_read(start, stdout.reader, stderr.reader)
+                return CommandResult(
+                    stdout.reader.result(),
+                    stderr.reader.result(),
+                    stdout.exit_status,
+                    stdout.reader.truncated or stderr.reader.truncated,
+                    bytes_read,
+                )
+        raise ShellClosedError(f"Shell on {self.name} exited") # Not reached
+
+    async def _async_shell_start(self, deadline: Deadline) -> None:
+        """Open the shell and skip whatever the login printed (banner, motd)"""
+        if self.closed: # Released since the command was queued, do not reconnect
+            raise ConnectionClosedError(f"Connection to {self.name} is closed")
+        await self._async_shell_open(deadline)
+        self.shell_starts += 1
+        sentinel = new_sentinel()
+        await self._async_shell_exchange(
+            build_shell_sync(sentinel),
+            FrameReader(sentinel, None, True, begin=False),
+            FrameReader(sentinel, None, False, begin=False),
+            deadline,
+        )
+        _LOGGER.debug("Started a persistent shell on %s", self.name)
+
+    async def async_stream(self, command: str, timeout: float | None = None) -> AsyncIterator[str]:
+        """Run a long-lived command, yielding stdout line by line as it arrives
+
+        The timeout only bounds connecting and starting the command. Streams
+        are not counted against max_sessions, as they never give the slot back.
+        """
+        self.health.check()
+        try:
+            async for line in self._async_stream(command, timeout):
+                if self.health.state != ConnectionState.READY:
+                    self.health.record_success()
+                yield line
+        except asyncio.CancelledError:
+            self.health.record_cancelled()
+            raise
+        except Exception:
+            await self._async_handle_failure()
+            raise
+
+    async def async_connect(self, timeout: float | None = None) -> None:
+        """Open the shared transport ahead of the first command, bounded by the timeout"""
+        self.health.check()
+        try:
+            await self._async_connect_transport(timeout)
+        except asyncio.CancelledError:
+            self.health.record_cancelled()
+            raise
+        except CommandSkippedError: # Not the host's fault
+            self.health.record_cancelled()
+            raise
+        except Exception:
+            self.health.record_failure()
+            raise
+        self.health.record_success()
+
+    async def _async_handle_failure(self) -> None:
+        self.health.record_failure()
+        await self._async_check_transport()
+
+    async def _async_check_transport(self) -> None:
+        """Drop the transport if it no longer responds, so the next use reconnects"""
+
+    @abstractmethod
+    async def _async_connect_transport(self, timeout: float | None) -> None:
+        """Backend implementation of async_connect"""
+
+    @abstractmethod
+    def _shell_alive(self) -> bool:
+        """Whether the persistent shell is open"""
+
+    @abstractmethod
+    async def _async_shell_open(self, deadline: Deadline) -> None:
+        """Open a new persistent shell on the shared transport"""
+
+    @abstractmethod
+    async def _async_shell_exchange(
+        self, script: bytes, stdout: FrameReader, stderr: FrameReader, deadline: Deadline
+    ) -> None:
+        """Send a framed script to the shell and read both streams up to its sentinels
+
+        Raises ShellClosedError if the shell ends first.
+        """
+
+    @abstractmethod
+    async def _async_shell_stop(self) -> None:
+        """Close the persistent shell, if open"""
+
+    @abstractmethod
+    async def _async_run(
+        self, command: str, timeout: float | None, capture: OutputCapture
+    ) -> CommandResult:
+        """Backend implementation of async_run"""
+
+    @abstractmethod
+    def _async_stream(self, command: str, timeout: float | None) -> AsyncIterator[str]:
+        """Backend implementation of async_stream"""
+
+    @abstractmethod
+    async def _async_read_files(
+        self, requests: list[FileRequest], timeout: float | None
+    ) -> list[FileRead | Exception]:
+        """Backend implementation of async_read_files"""
+
+    async def async_close(self) -> None:
+        """Close the shared transport and fail any command still waiting for a channel"""
+        self.closed = True
+        async with self._session_available:
+            self._session_available.notify_all()
+        await self._async_close()
+
+    @abstractmethod
+    async def _async_close(self) -> None:
+        """Backend implementation of async_close"""
+
+
+class _RejectNewKeyTypePolicy(paramiko.MissingHostKeyPolicy):
+    """Refuse a known host's key of a type it never presented before"""
+
+    def __init__(self, known: dict[str, paramiko.PKey]) -> None:
+        self._known = known
+
+    def missing_host_key(
+        self, client: paramiko.SSHClient, hostname: str, key: paramiko.PKey
+    ) -> None:
+        raise paramiko.BadHostKeyException(hostname, key, next(iter(self._known.values())))
+
+
+class ParamikoConnection(SSHConnection):
+    """Blocking paramiko transport, driven from the integration's worker threads"""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        key: ConnectionKey,
+        key_file: str | None,
+        password: str | None,
+        key_store: KeyStore,
+        known_hosts: KnownHostsStore,
+        workers: SSHWorkerPool,
+    ) -> None:
+        """Initialize the connection"""
+        super().__init__(hass, key, key_file, password, key_store, known_hosts)
+        self.workers = workers
+        self._client: paramiko.SSHClient | None = None
+        self._lock = threading.Lock()
+        self._sftp: paramiko.SFTPClient | None = None
+        self._sftp_lock = threading.Lock() # SFTP requests are serialized on one channel
+        self._shell: paramiko.Channel | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {**super().as_dict(), "workers": self.workers.name}
+
+    def _connect(self, deadline: Deadline) -> paramiko.SSHClient:
+        """Open the shared transport, callers must hold the lock"""
+        client = paramiko.SSHClient()
+        known = self._known_hosts.get(self.key.host, self.key.port)
+        for key_type, host_key in known.items():
+            # Also makes paramiko ask for the known key type first
+            client.get_host_keys().add(
+                host_key_name(self.key.host, self.key.port), key_type, host_key
+            )
+        # New hosts are accepted and their key stored once connected
+        client.set_missing_host_key_policy(
+            _RejectNewKeyTypePolicy(known) if known else paramiko.AutoAddPolicy()
+        )
+        pkey = self._get_private_key()
+        self.health.record_connecting()
+        # The socket is opened here so the TCP connect is timed apart from authentication
+        with self.metrics.time(Phase.CONNECT):
+            if self.jump is not None:
+                sock = self.jump.open_tunnel(self.key.host, self.key.port, deadline)
+            else:
+                sock = socket.create_connection(
+                    (self.key.host, self.key.port), deadline.remaining()
+                )
+        # The same budget bounds the SSH banner and authentication
+        timeout = deadline.remaining()
+        try:
+            client.connect(
+                self.key.host,
+                port=self.key.port,
+                username=self.key.username,
+                password=self._password,
+                pkey=pkey,
+                allow_agent=self.key.agent,
+                look_for_keys=False,
+                compress=bool(self.key.security.compression),
+                timeout=timeout,
+                banner_timeout=timeout,
+                auth_timeout=timeout,
+                sock=sock,
+                transport_factory=_timed_transport_factory(self.metrics, self.key.security),
+            )
+        except paramiko.BadHostKeyException as err:
+            client.close()
+            sock.close()
+            raise HostKeyChangedError(
+                f"Host key of {self.name} changed, remove its line from "
+                f"{self._known_hosts.path} if that was expected"
+            ) from err
+        except Exception:
+            client.close()
+            sock.close()
+            raise
+        transport = client.get_transport()
+        self.metrics.record(Phase.AUTH, time.monotonic() - transport.kex_done)
+        if not known:
+            self._known_hosts.learn(
+                self.key.host, self.key.port, transport.get_remote_server_key()
+            )
+        self.negotiated = {
+            "cipher": transport.local_cipher,
+            "mac": transport.local_mac,
+            "compression": transport.local_compression,
+            "host_key": transport.host_key_type,
+        }
+        transport.set_keepalive(KEEPALIVE_INTERVAL)
+        self.metrics.connections += 1
+        _LOGGER.debug("Opened shared SSH connection to %s", self.name)
+        return client
+
+    def _get_client(self, deadline: Deadline) -> paramiko.SSHClient:
+        """Get the shared client, reconnecting if the transport has dropped"""
+        timeout = deadline.remaining()
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            raise socket.timeout("Timed out waiting for the connection")
+        try:
+            if self._client is not None:
+                transport = self._client.get_transport()
+                if transport is None or not transport.is_active():
+                    self._client.close()
+                    self._client = None
+            if self._client is None:
+                self._client = self._connect(deadline)
+            return self._client
+        finally:
+            self._lock.release()
+
+    def open_tunnel(self, host: str, port: int, deadline: Deadline) -> paramiko.Channel:
+        """Open a direct-tcpip channel to a host behind this one, blocking"""
+        transport = self._get_client(deadline).get_transport()
+        return transport.open_channel(
+            "direct-tcpip", (host, port), ("127.0.0.1", 0), timeout=deadline.remaining()
+        )
+
+    def _open_channel(
+        self, command: str, deadline: Deadline, operation: _Operation
+    ) -> paramiko.Channel:
+        transport = self._get_client(deadline).get_transport()
+        with self.metrics.time(Phase.CHANNEL_OPEN):
+            channel = transport.open_session(timeout=deadline.remaining())
+        operation.channel = channel
+        if operation.cancelled: # Cancelled while the channel was opening
+            channel.close()
+            raise socket.timeout("Operation cancelled")
+        channel.settimeout(deadline.remaining())
+        with self.metrics.time(Phase.EXEC):
+            channel.exec_command(command)
+        return channel
+
+    @staticmethod
+    def _read(recv, channel: paramiko.Channel, deadline: Deadline, reader: OutputReader) -> bool:
+        """Feed the reader until EOF, never blocking past the deadline
+
+        Returns True if the reader had enough before EOF.
+        """
+        while True:
+            channel.settimeout(deadline.remaining())
+            if not (data := recv(READ_CHUNK_SIZE)):
+                return False
+            if reader.feed(data):
+                return True
+
+    def _run(
+        self,
+        command: str,
+        deadline: Deadline,
+        operation: _Operation,
+        capture: OutputCapture,
+        queued: float,
+    ) -> CommandResult:
+        self.metrics.record(Phase.EXECUTOR_WAIT, time.monotonic() - queued)
+        # Channels are opened independently, so the lock is not held while the command runs
+        channel = self._open_channel(command, deadline, operation)
+        start = time.monotonic()
+        stdout = capture.reader()
+        stderr = OutputCapture(capture.max_bytes).reader()
+        exit_status = None
+        try:
+            # Stopping early just closes the channel, the rest is never transferred
+            if not self._read(channel.recv, channel, deadline, stdout):
+                self._read(channel.recv_stderr, channel, deadline, stderr)
+                if not channel.status_event.wait(deadline.remaining()):
+                    raise socket.timeout("Timed out waiting for the exit status")
+                exit_status = channel.exit_status
+            bytes_read = self._record_read(start, stdout, stderr)
+            return CommandResult(
+                stdout.result(),
+                stderr.result(),
+                exit_status,
+                stdout.truncated or stderr.truncated,
+                bytes_read,
+            )
+        finally:
+            channel.close()
+
+    def _get_sftp(self, deadline: Deadline) -> paramiko.SFTPClient:
+        """Get the shared SFTP session, reopening it with the transport, callers must hold the SFTP lock"""
+        transport = self._get_client(deadline).get_transport()
+        if self._sftp is None or self._sftp.get_channel().get_transport() is not transport:
+            with self.metrics.time(Phase.CHANNEL_OPEN):
+                self._sftp = paramiko.SFTPClient.from_transport(transport)
+            _LOGGER.debug("Opened SFTP session to %s", self.name)
+        self._sftp.get_channel().settimeout(deadline.remaining())
+        return self._sftp
+
+    def _read_files(
+        self, requests: list[FileRequest], deadline: Deadline, queued: float
+    ) -> list[FileRead | Exception]:
+        self.metrics.record(Phase.EXECUTOR_WAIT, time.monotonic() - queued)
+        results: list[FileRead | Exception] = []
+        with self._sftp_lock:
+            sftp = self._get_sftp(deadline)
+            for request in requests:
+                try:
+                    attrs = sftp.stat(request.path)
+                    if request.unchanged(attrs.st_mtime, attrs.st_size):
+                        results.append(FileRead(attrs.st_mtime, attrs.st_size))
+                        continue
+                    reader = request.capture.reader()
+                    with sftp.open(request.path, "rb") as remote:
+                        while (data := remote.read(READ_CHUNK_SIZE)) and not reader.feed(data):
+                            deadline.remaining() # Give up once the budget is spent
+                    results.append(
+                        FileRead(
+                            attrs.st_mtime,
+                            attrs.st_size,
+                            reader.result(),
+                            reader.truncated,
+                            reader.bytes_read,
+                        )
+                    )
+                except socket.timeout:
+                    raise
+                except OSError as err: # Missing or unreadable, the SFTP session is fine
+                    results.append(err)
+        return results
+
+    async def _async_read_files(
+        self, requests: list[FileRequest], timeout: float | None
+    ) -> list[FileRead | Exception]:
+        try:
+            async with async_timeout.timeout(timeout):
+                return await self.workers.async_run(
+                    self._read_files, requests, Deadline(timeout), time.monotonic()
+                )
+        except (asyncio.TimeoutError, socket.timeout) as err:
+            self._record_timeout("<sftp>", timeout)
+            raise asyncio.TimeoutError(f"Timed out reading files on {self.name}") from err
+
+    def _close(self) -> None:
+        shell, self._shell = self._shell, None
+        if shell is not None:
+            shell.close()
+        with self._sftp_lock:
+            sftp, self._sftp = self._sftp, None
+        if sftp is not None:
+            sftp.close()
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+            _LOGGER.debug("Closed shared SSH connection to %s", self.name)
+
+    def _probe(self) -> None:
+        """Open and close a channel to prove the transport still round trips"""
+        with self._lock:
+            client = self._client
+        if client is None:
+            return
+        try:
+            transport = client.get_transport()
+            if transport is None or not transport.is_active():
+                raise paramiko.SSHException("Transport is not active")
+            transport.open_session(timeout=PROBE_TIMEOUT).close()
+        except Exception as err:
+            _LOGGER.debug("Dropping dead transport to %s: %s", self.name, err)
+            with self._lock:
+                if self._client is client:
+                    self._client = None
+            client.close()
+
+    async def _async_connect_transport(self, timeout: float | None) -> None:
+        await self.workers.async_run(self._get_client, Deadline(timeout))
+
+    def _shell_alive(self) -> bool:
+        return self._shell is not None and not self._shell.closed
+
+    def _open_shell(self, deadline: Deadline) -> None:
+        transport = self._get_client(deadline).get_transport()
+        with self.metrics.time(Phase.CHANNEL_OPEN):
+            channel = transport.open_session(timeout=deadline.remaining())
+        channel.invoke_shell() # No pty, so nothing is echoed and there is no prompt
+        self._shell = channel
+
+    async def _async_shell_open(self, deadline: Deadline) -> None:
+        await self.workers.async_run(self._open_shell, deadline)
+
+    def _shell_exchange(
+        self, script: bytes, stdout: FrameReader, stderr: FrameReader, deadline: Deadline
+    ) -> None:
+        channel = self._shell
+        try:
+            channel.settimeout(deadline.remaining())
+            channel.sendall(script)
+            # stderr is buffered by paramiko meanwhile, its sentinel is printed last
+            for recv, frame in ((channel.recv, stdout), (channel.recv_stderr, stderr)):
+                while not frame.done:
+                    channel.settimeout(deadline.remaining())
+                    if not (data := recv(READ_CHUNK_SIZE)):
+                        raise ShellClosedError(f"Shell on {self.name} exited")
+                    frame.feed(data)
+        except socket.timeout:
+            raise
+        except (OSError, EOFError, AttributeError) as err: # AttributeError once stopped meanwhile
+            raise ShellClosedError(f"Shell on {self.name} exited: {err}") from err
+
+    async def _async_shell_exchange(
+        self, script: bytes, stdout: FrameReader, stderr: FrameReader, deadline: Deadline
+    ) -> None:
+        await self.workers.async_run(self._shell_exchange, script, stdout, stderr, deadline)
+
+    async def _async_shell_stop(self) -> None:
+        # Closing wakes up a worker thread still blocked reading the shell
+        shell, self._shell = self._shell, None
+        if shell is not None:
+            shell.close()
+
+    async def _async_check_transport(self) -> None:
+        """Drop the transport if it no longer responds, so the next use reconnects"""
+        # Never skipped, a dead transport would otherwise linger until the queue drains
+        await self.workers.async_run(self._probe, shed=False)
+
+    async def _async_run(
+        self, command: str, timeout: float | None, capture: OutputCapture
+    ) -> CommandResult:
+        operation = _Operation()
+        try:
+            async with async_timeout.timeout(timeout):
+                return await self.workers.async_run(
+                    self._run, command, Deadline(timeout), operation, capture, time.monotonic()
+                )
+        except (asyncio.TimeoutError, socket.timeout) as err:
+            operation.cancel()
+            self._record_timeout(command, timeout)
+            raise asyncio.TimeoutError(f"Timed out running '{command}' on {self.name}") from err
+        except asyncio.CancelledError:
+            # Free the worker thread instead of leaving it blocked on the channel
+            operation.cancel()
+            raise
+
+    async def _async_stream(self, command: str, timeout: float | None) -> AsyncIterator[str]:
+        operation = _Operation()
+        try:
+            channel = await self.workers.async_run(
+                self._open_channel, command, Deadline(timeout), operation
+            )
+        except asyncio.CancelledError:
+            operation.cancel()
+            raise
+        channel.settimeout(None) # Streams stay open indefinitely once started
+        stdout = channel.makefile("r")
+        queue: asyncio.Queue[str | Exception | None] = asyncio.Queue()
+
+        def pump() -> None:
+            """Read lines on a dedicated thread so no worker thread is held"""
+            try:
+                for line in stdout:
+                    self.hass.loop.call_soon_threadsafe(queue.put_nowait, line)
+            except Exception as err:
+                self.hass.loop.call_soon_threadsafe(queue.put_nowait, err)
+            finally:
+                self.hass.loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        threading.Thread(target=pump, name=f"SSH Stream - {self.name}", daemon=True).start()
+        try:
+            while (line := await queue.get()) is not None:
+                if isinstance(line, Exception):
+                    raise line
+                yield line
+        finally:
+            channel.close()
+
+    async def _async_close(self) -> None:
+        await self.workers.async_run(self._close, shed=False)
+
+
+class AsyncSSHConnection(SSHConnection):
+    """Native asyncio transport, runs entirely on the event loop"""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        key: ConnectionKey,
+        key_file: str | None,
+        password: str | None,
+        key_store: KeyStore,
+        known_hosts: KnownHostsStore,
+    ) -> None:
+        """Initialize the connection"""
+        super().__init__(hass, key, key_file, password, key_store, known_hosts)
+        self._conn: asyncssh.SSHClientConnection | None = None
+        self._lock = asyncio.Lock()
+        self._sftp: asyncssh.SFTPClient | None = None
+        self._sftp_conn: asyncssh.SSHClientConnection | None = None # Connection the session is on
+        self._sftp_lock = asyncio.Lock()
+        self._shell: asyncssh.SSHClientProcess | None = None
+
+    async def _async_connect(self) -> asyncssh.SSHClientConnection:
+        """Open the shared transport, callers must hold the lock"""
+        options: dict[str, Any] = {}
+        if private_key := await self.hass.async_add_executor_job(self._get_private_key):
+            options["client_keys"] = [private_key]
+        elif not self.key.agent:
+            options["client_keys"] = None
+        if not self.key.agent: # Otherwise SSH_AUTH_SOCK is used
+            options["agent_path"] = None
+        known = await self.hass.async_add_executor_job(
+            self._known_hosts.get, self.key.host, self.key.port
+        )
+        options.update(_asyncssh_algorithms(self.key.security, known))
+        if self.jump is not None: # Forwarded over the jump host's shared connection
+            options["tunnel"] = await self.jump.async_get_tunnel()
+        self.health.record_connecting()
+        try:
+            conn = await asyncssh.connect(
+                self.key.host,
+                port=self.key.port,
+                username=self.key.username,
+                password=self._password,
+                # Nothing is trusted up front, the client checks host keys itself
+                known_hosts=([], [], []),
+                client_factory=_timed_client_factory(self.metrics, known),
+                **options,
+                # Unanswered keepalives close the connection, which triggers a reconnect
+                keepalive_interval=KEEPALIVE_INTERVAL,
+                keepalive_count_max=KEEPALIVE_COUNT_MAX,
+            )
+        except asyncssh.HostKeyNotVerifiable as err:
+            raise HostKeyChangedError(
+                f"Host key of {self.name} changed, remove its line from "
+                f"{self._known_hosts.path} if that was expected"
+            ) from err
+        host_key = conn.get_server_host_key()
+        if not known:
+            await self.hass.async_add_executor_job(
+                self._known_hosts.learn, self.key.host, self.key.port, _to_paramiko_key(host_key)
+            )
+        self.negotiated = {
+            "cipher": conn.get_extra_info("send_cipher"),
+            "mac": conn.get_extra_info("send_mac"),
+            "compression": conn.get_extra_info("send_compression"),
+            "host_key": host_key.get_algorithm(),
+        }
+        self.metrics.connections += 1
+        _LOGGER.debug("Opened shared SSH connection to %s", self.name)
+        self.hass.async_create_background_task(
+            self._async_watch_closed(conn), f"SSH Connection - {self.name}"
+        )
+        return conn
+
+    async def _async_watch_closed(self, conn: asyncssh.SSHClientConnection) -> None:
+        """Forget the transport once it closes so the next command reconnects"""
+        await conn.wait_closed()
+        if self._conn is conn:
+            self._conn = None
+
+    async def _async_get_conn(self) -> asyncssh.SSHClientConnection:
+        async with self._lock:
+            if self._conn is None:
+                self._conn = await self._async_connect()
+            return self._conn
+
+    async def _async_connect_transport(self, timeout: float | None) -> None:
+        async with async_timeout.timeout(timeout):
+            await self._async_get_conn()
+
+    def _shell_alive(self) -> bool:
+        return self._shell is not None and not self._shell.is_closing()
+
+    async def _async_shell_open(self, deadline: Deadline) -> None:
+        conn = await self._async_get_conn()
+        with self.metrics.time(Phase.CHANNEL_OPEN):
+            # No command and no terminal type, so a plain shell without echo or prompt
+            self._shell = await conn.create_process(encoding=None)
+
+    async def _async_shell_exchange(
+        self, script: bytes, stdout: FrameReader, stderr: FrameReader, deadline: Deadline
+    ) -> None:
+        process = self._shell
+        try:
+            process.stdin.write(script)
+            # stderr is buffered by asyncssh meanwhile, its sentinel is printed last
+            for stream, frame in ((process.stdout, stdout), (process.stderr, stderr)):
+                while not frame.done:
+                    if not (data := await stream.read(READ_CHUNK_SIZE)):
+                        raise ShellClosedError(f"Shell on {self.name} exited")
+                    frame.feed(data)
+        except (asyncssh.Error, OSError) as err:
+            raise ShellClosedError(f"Shell on {self.name} exited: {err}") from err
+
+    async def _async_shell_stop(self) -> None:
+        shell, self._shell = self._shell, None
+        if shell is not None:
+            shell.close()
+
+    async def async_get_tunnel(self) -> asyncssh.SSHClientConnection:
+        """Get the connection that hosts behind this one are reached through"""
+        return await self._async_get_conn()
+
+    @staticmethod
+    async def _async_read(stream: asyncssh.SSHReader, reader: OutputReader) -> bool:
+        """Feed the reader until EOF, returning True if it had enough before EOF"""
+        while data := await stream.read(READ_CHUNK_SIZE):
+            if reader.feed(data):
+                return True
+        return False
+
+    async def _async_run(
+        self, command: str, timeout: float | None, capture: OutputCapture
+    ) -> CommandResult:
+        stdout = capture.reader()
+        stderr = OutputCapture(capture.max_bytes).reader()
+        exit_status = None
+        try:
+            async with async_timeout.timeout(timeout):
+                conn = await self._async_get_conn()
+                start = time.monotonic()
+                # Leaving the context closes the channel, including on timeout or cancel
+                async with conn.create_process(command, encoding=None) as process:
+                    self.metrics.record(Phase.EXEC, time.monotonic() - start)
+                    start = time.monotonic()
+                    stderr_task = asyncio.ensure_future(self._async_read(process.stderr, stderr))
+                    try:
+                        if not await self._async_read(process.stdout, stdout):
+                            await stderr_task
+                            exit_status = (await process.wait(check=False)).exit_status
+                    finally:
+                        stderr_task.cancel()
+        except asyncio.TimeoutError:
+            self._record_timeout(command, timeout)
+            raise
+        bytes_read = self._record_read(start, stdout, stderr)
+        return CommandResult(
+            stdout.result(),
+            stderr.result(),
+            exit_status,
+            stdout.truncated or stderr.truncated,
+            bytes_read,
+        )
+
+    async def _async_get_sftp(self) -> asyncssh.SFTPClient:
+        """Get the shared SFTP session, reopening it with the transport"""
+        async with self._sftp_lock:
+            conn = await self._async_get_conn()
+            if self._sftp is None or self._sftp_conn is not conn:
+                with self.metrics.time(Phase.CHANNEL_OPEN):
+                    self._sftp = await conn.start_sftp_client()
+                self._sftp_conn = conn
+                _LOGGER.debug("Opened SFTP session to %s", self.name)
+            return self._sftp
+
+    async def _async_read_files(
+        self, requests: list[FileRequest], timeout: float | None
+    ) -> list[FileRead | Exception]:
+
+        async def read(request: FileRequest) -> FileRead | Exception:
+            try:
+                attrs = await sftp.stat(request.path)
+                if request.unchanged(attrs.mtime, attrs.size):
+                    return FileRead(attrs.mtime, attrs.size)
+                reader = request.capture.reader()
+                async with sftp.open(request.path, "rb") as remote:
+                    while (data := await remote.read(READ_CHUNK_SIZE)) and not reader.feed(data):
+                        pass
+                return FileRead(
+                    attrs.mtime, attrs.size, reader.result(), reader.truncated, reader.bytes_read
+                )
+            except asyncssh.SFTPError as err: # Missing or unreadable, the session is fine
+                return err
+
+        try:
+            async with async_timeout.timeout(timeout):
+                sftp = await self._async_get_sftp()
+                # Requests are pipelined over the one session instead of waiting in turn
+                return list(await asyncio.gather(*(read(request) for request in requests)))
+        except asyncio.TimeoutError as err:
+            self._record_timeout("<sftp>", timeout)
+            raise asyncio.TimeoutError(f"Timed out reading files on {self.name}") from err
+
+    async def _async_stream(self, command: str, timeout: float | None) -> AsyncIterator[str]:
+        async with async_timeout.timeout(timeout):
+            conn = await self._async_get_conn()
+            process = await conn.create_process(command)
+        async with process:
+            async for line in process.stdout:
+                yield line
+
+    async def _async_close(self) -> None:
+        self._sftp = self._sftp_conn = self._shell = None # Closed along with the connection
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+            await conn.wait_closed()
+            _LOGGER.debug("Closed shared SSH connection to %s", self.name)
+
+
+def _timed_transport_factory(
+    metrics: ConnectionMetrics, security: SecurityOptions
+) -> Callable[..., paramiko.Transport]:
+    """Build paramiko transports that offer the configured algorithms and time key exchange"""
+
+    class TimedTransport(paramiko.Transport):
+        kex_done = 0.0
+
+        def start_client(self, event=None, timeout=None) -> None:
+            started = time.monotonic()
+            super().start_client(event, timeout)
+            self.kex_done = time.monotonic()
+            metrics.record(Phase.KEX, self.kex_done - started)
+
+    def factory(sock: socket.socket, **kwargs: Any) -> paramiko.Transport:
+        transport = TimedTransport(sock, **kwargs)
+        options = transport.get_security_options()
+        # Each setter rejects names paramiko does not support
+        if security.kex:
+            options.kex = security.kex
+        if security.ciphers:
+            options.ciphers = security.ciphers
+        if security.macs:
+            options.digests = security.macs
+        if security.host_keys:
+            options.key_types = security.host_keys
+        return transport
+
+    return factory
+
+
+def _asyncssh_algorithms(
+    security: SecurityOptions, known: dict[str, paramiko.PKey]
+) -> dict[str, Any]:
+    """Options of asyncssh.connect for the configured algorithms"""
+    options: dict[str, Any] = {}
+    if security.kex:
+        options["kex_algs"] = list(security.kex)
+    if security.ciphers:
+        options["encryption_algs"] = list(security.ciphers)
+    if security.macs:
+        options["mac_algs"] = list(security.macs)
+    if security.host_keys:
+        options["server_host_key_algs"] = list(security.host_keys)
+    elif known: # Ask for the key types already trusted, as paramiko does
+        options["server_host_key_algs"] = [
+            algorithm.decode()
+            for host_key in known.values()
+            for algorithm in asyncssh.import_public_key(
+                f"{host_key.get_name()} {host_key.get_base64()}"
+            ).sig_algorithms
+        ]
+    if security.compression is not None:
+        options["compression_algs"] = (
+            ["zlib@openssh.com", "zlib", "none"] if security.compression else ["none"]
+        )
+    return options
+
+
+def _to_paramiko_key(host_key: asyncssh.SSHKey) -> paramiko.PKey:
+    """Convert a host key so the known hosts store can save it"""
+    line = host_key.export_public_key("openssh").decode()
+    return HostKeyEntry.from_line(f"host {line}").key
+
+
+def _timed_client_factory(
+    metrics: ConnectionMetrics, known: dict[str, paramiko.PKey]
+) -> type[asyncssh.SSHClient]:
+    """Build an asyncssh client that times each step of connecting and checks the host key"""
+    started = time.monotonic()
+    trusted = {host_key.get_base64() for host_key in known.values()}
+
+    class TimedClient(asyncssh.SSHClient):
+        def connection_made(self, conn: asyncssh.SSHClientConnection) -> None:
+            nonlocal started
+            metrics.record(Phase.CONNECT, time.monotonic() - started)
+            started = time.monotonic()
+
+        def validate_host_public_key(
+            self, host: str, addr: str, port: int, key: asyncssh.SSHKey
+        ) -> bool:
+            """Accept new hosts, and known hosts only with the key they had before"""
+            # Called once the server proved it holds the key, ending key exchange
+            nonlocal started
+            metrics.record(Phase.KEX, time.monotonic() - started)
+            started = time.monotonic()
+            return not trusted or key.export_public_key("openssh").split()[1].decode() in trusted
+
+        def auth_completed(self) -> None:
+            metrics.record(Phase.AUTH, time.monotonic() - started)
+
+    return TimedClient
+
+
+def create_connection(
+    hass: HomeAssistant,
+    key: ConnectionKey,
+    key_file: str | None,
+    password: str | None,
+    key_store: KeyStore,
+    known_hosts: KnownHostsStore,
+    workers: SSHWorkerPool,
+) -> SSHConnection:
+    """Create a connection for the backend requested in the key
+
+    Only paramiko blocks, so only paramiko connections use the worker pool.
+    """
+    if key.backend == BACKEND_ASYNCSSH:
+        if asyncssh is not None:
+            return AsyncSSHConnection(hass, key, key_file, password, key_store, known_hosts)
+        _LOGGER.warning(
+            "asyncssh is not installed, falling back to paramiko for %s", key.host
+        )
+    return ParamikoConnection(hass, key, key_file, password, key_store, known_hosts, workers)
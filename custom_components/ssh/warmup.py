@@ -0,0 +1,93 @@
+"""Background connection warm-up at startup for the SSH integration"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import WARM_UP_TIMEOUT
+from .transport import SSHConnection
+
+if TYPE_CHECKING:
+    from .pool import ConnectionKey
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ConnectionWarmUp:
+    """Open the connections set up before Home Assistant started, all at once
+
+    Entities are added with an unknown state and never wait for their host.
+    Each connection is opened in a background task, so a dead host only
+    delays its own entities and never startup. Once Home Assistant has
+    started, the time every host took is reported.
+    """
+
+    def __init__(self, hass: HomeAssistant, timeout: float = WARM_UP_TIMEOUT) -> None:
+        """Initialize the warm-up"""
+        self.hass = hass
+        self.timeout = timeout
+        self.started = False
+        self._start: float | None = None
+        self._tasks: dict[ConnectionKey, asyncio.Task] = {}
+        self.results: dict[str, float | str] = {} # Seconds to connect, or why it failed
+        self.elapsed: float | None = None
+
+    @callback
+    def async_add(self, connection: SSHConnection) -> None:
+        """Start opening a new connection, unless startup is over"""
+        if self.started:
+            return
+        if self._start is None:
+            self._start = time.monotonic()
+        self._tasks[connection.key] = self.hass.async_create_background_task(
+            self._async_connect(connection), f"SSH warm-up - {connection.name}"
+        )
+
+    @callback
+    def async_cancel(self, connection: SSHConnection) -> None:
+        """Stop opening a connection that was released meanwhile"""
+        if (task := self._tasks.pop(connection.key, None)) is not None:
+            task.cancel()
+
+    async def _async_connect(self, connection: SSHConnection) -> None:
+        start = time.monotonic()
+        try:
+            await connection.async_connect(self.timeout)
+        except asyncio.TimeoutError:
+            self.results[connection.name] = "timed out"
+        except Exception as err: # Reported with the rest, the first poll retries
+            self.results[connection.name] = str(err) or type(err).__name__
+        else:
+            self.results[connection.name] = round(time.monotonic() - start, 3)
+
+    @callback
+    def async_report(self, hass: HomeAssistant) -> None:
+        """Report how long every host took, once the last one is done"""
+        self.started = True
+        if self._start is not None:
+            hass.async_create_background_task(self._async_report(), "SSH warm-up report")
+
+    async def _async_report(self) -> None:
+        if tasks := list(self._tasks.values()): # Some may have been cancelled meanwhile
+            await asyncio.wait(tasks)
+        self._tasks.clear()
+        self.elapsed = round(time.monotonic() - self._start, 3)
+        failed = {name: result for name, result in self.results.items() if isinstance(result, str)}
+        times = {name: result for name, result in self.results.items() if name not in failed}
+        slowest = max(times, key=times.get, default=None)
+        _LOGGER.info(
+            "Connected to %s of %s SSH hosts in the background in %.1fs%s",
+            len(times),
+            len(self.results),
+            self.elapsed,
+            f", slowest {slowest} ({times[slowest]:.1f}s)" if slowest else "",
+        )
+        for name, error in failed.items():
+            _LOGGER.warning("Could not connect to %s at startup, will retry on poll: %s", name, error)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"started": self.started, "elapsed": self.elapsed, "hosts": self.results}
@@ -0,0 +1,93 @@
+"""Dedicated worker threads for blocking SSH calls"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+from typing import Any, TypeVar
+
+from .health import CommandSkippedError
+
+_T = TypeVar("_T")
+
+
+class WorkersSaturatedError(CommandSkippedError):
+    """Raised instead of queuing when every worker is busy and the queue is full"""
+
+
+class SSHWorkerPool:
+    """Bounded thread pool kept apart from Home Assistant's executor
+
+    Hung hosts can only tie up these threads, never the executor that other
+    integrations and file I/O depend on.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int) -> None:
+        """Initialize the pool, threads are started on demand"""
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.submitted = 0
+        self.rejected = 0
+
+    @property
+    def saturated(self) -> bool:
+        return self.queued >= self.max_queue
+
+    async def async_run(self, func: Callable[..., _T], *args: Any, shed: bool = True) -> _T:
+        """Run a blocking call on a worker
+
+        Raises WorkersSaturatedError when the queue is full, unless shed is
+        False, which is for calls that must happen, such as closing.
+        """
+        with self._lock:
+            if shed and self.saturated:
+                self.rejected += 1
+                raise WorkersSaturatedError(
+                    f"All {self.max_workers} {self.name} workers are busy and "
+                    f"{self.queued} calls are queued, skipping"
+                )
+            self.queued += 1
+            self.submitted += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+
+        def run() -> _T:
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.active -= 1
+
+        def dequeue_cancelled(future: Future) -> None:
+            if future.cancelled(): # Never started, so run() did not dequeue it
+                with self._lock:
+                    self.queued -= 1
+
+        future = self._executor.submit(run)
+        future.add_done_callback(dequeue_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        """Stop the threads once their current calls return, dropping queued ones"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def as_dict(self) -> dict[str, int | bool]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "saturated": self.saturated,
+            "peak_queued": self.peak_queued,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+        }
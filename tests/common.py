@@ -0,0 +1,41 @@
+"""Shared helpers for the SSH integration tests"""
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+import asyncio
+import os
+from pathlib import Path
+import tempfile
+from typing import Any
+
+from homeassistant import bootstrap
+from homeassistant.config_entries import ConfigEntries
+from homeassistant.core import HomeAssistant
+
+ROOT = Path(__file__).parent.parent
+
+
+async def async_start_hass(config_dir: str) -> HomeAssistant:
+    """Bring up just enough of Home Assistant to load YAML platforms"""
+    hass = HomeAssistant()
+    hass.config.config_dir = config_dir
+    hass.config.skip_pip = True
+    hass.config_entries = ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await bootstrap.load_registries(hass)
+    return hass
+
+
+def run_with_hass(test: Callable[[HomeAssistant], Awaitable[Any]]) -> Any:
+    """Run a coroutine against a minimal Home Assistant that can load the integration"""
+
+    async def _async_run() -> Any:
+        with tempfile.TemporaryDirectory() as config_dir:
+            os.symlink(ROOT / "custom_components", Path(config_dir) / "custom_components")
+            hass = await async_start_hass(config_dir)
+            try:
+                return await test(hass)
+            finally:
+                await hass.async_stop(force=True)
+
+    return asyncio.run(_async_run())
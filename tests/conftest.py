@@ -0,0 +1,6 @@
+"""Make the integration and the stand-in SSH server importable from the tests"""
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "benchmarks")]
@@ -0,0 +1,50 @@
+"""Tests for running several commands in one invocation"""
+from __future__ import annotations
+
+import subprocess
+
+from custom_components.ssh.batch import build_batch, split_batch
+from custom_components.ssh.reader import OutputCapture
+from custom_components.ssh.transport import CommandResult
+
+MARKER = "HASS-SSH-test"
+
+
+def run_batch(commands: list[str]) -> CommandResult:
+    process = subprocess.run(
+        ["sh", "-c", build_batch(commands, MARKER)], capture_output=True, text=True, check=False
+    )
+    return CommandResult(process.stdout, process.stderr, process.returncode)
+
+
+def test_each_command_gets_its_own_output_and_exit_code() -> None:
+    commands = ["echo one", "echo two >&2; exit 3", "printf 'no newline'", "true"]
+    results = split_batch(run_batch(commands), MARKER, [OutputCapture()] * len(commands))
+    assert [(r.stdout, r.stderr, r.exit_status) for r in results] == [
+        ("one\n", "", 0),
+        ("", "two\n", 3),
+        ("no newline", "", 0),
+        ("", "", 0),
+    ]
+    assert not any(result.truncated for result in results)
+
+
+def test_exit_does_not_end_the_batch() -> None:
+    results = split_batch(run_batch(["exit 1", "echo after"]), MARKER, [OutputCapture()] * 2)
+    assert [(r.stdout, r.exit_status) for r in results] == [("", 1), ("after\n", 0)]
+
+
+def test_captures_apply_per_command() -> None:
+    results = split_batch(
+        run_batch(["echo 123456789", "echo abc"]), MARKER, [OutputCapture(4), OutputCapture()]
+    )
+    assert (results[0].stdout, results[0].truncated) == ("1234", True)
+    assert (results[1].stdout, results[1].truncated) == ("abc\n", False)
+
+
+def test_output_cut_short_leaves_later_commands_without_exit_code() -> None:
+    full = run_batch(["echo one", "echo two"])
+    cut = CommandResult(full.stdout.split(f"\n{MARKER} 1")[0], "", None, truncated=True)
+    first, second = split_batch(cut, MARKER, [OutputCapture()] * 2)
+    assert (first.stdout, first.exit_status, first.truncated) == ("one\n", 0, True)
+    assert (second.stdout, second.exit_status) == ("two\n", None)
@@ -0,0 +1,84 @@
+"""Tests for skipping unchanged renders and state writes"""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.setup import async_setup_component
+
+from common import run_with_hass
+from custom_components.ssh.change import ChangeDetector
+from custom_components.ssh.diagnostics import async_get_diagnostics
+from fake_ssh_server import start_servers
+
+
+def process(detector: ChangeDetector, raw: str, value=None) -> bool | None:
+    """Run one poll through the detector, None when rendering was skipped"""
+    if not detector.changed(raw):
+        return None
+    return detector.should_write(raw if value is None else value)
+
+
+def test_unchanged_output_skips_the_render() -> None:
+    detector = ChangeDetector()
+    assert process(detector, "a") is True
+    assert process(detector, "a") is None
+    assert process(detector, "b") is True
+    assert detector.as_dict() == {"renders_skipped": 1, "writes_skipped": 0, "writes_performed": 2}
+
+
+def test_deadband_skips_small_changes() -> None:
+    detector = ChangeDetector(deadband=1)
+    assert process(detector, "10.0") is True
+    assert process(detector, "10.5") is False
+    assert process(detector, "10.5") is None # Recorded as processed, not rendered again
+    assert process(detector, "11.2") is True # Measured from the last written value
+    assert process(detector, "up") is True # Not a number, always written
+
+
+def test_min_interval_retries_the_skipped_output() -> None:
+    detector = ChangeDetector(min_interval=timedelta(seconds=10))
+    with patch("custom_components.ssh.change.time.monotonic", return_value=100):
+        assert process(detector, "a") is True
+        assert process(detector, "b") is False
+    with patch("custom_components.ssh.change.time.monotonic", return_value=111):
+        assert process(detector, "b") is True # Not marked processed when it was held back
+    assert detector.writes_skipped == 1
+
+
+def test_invalidate_forces_the_next_write() -> None:
+    detector = ChangeDetector()
+    assert process(detector, "on") is True
+    detector.invalidate()
+    assert process(detector, "on") is True
+
+
+def test_diagnostics_list_each_entity() -> None:
+    server = start_servers(1, 0, 16)[0]
+
+    async def _async_test(hass) -> None:
+        sensor = {
+            "platform": "ssh",
+            "name": "uptime",
+            "unique_id": "uptime",
+            "host": "127.0.0.1",
+            "port": server.port,
+            "username": "test",
+            "password": "test",
+            "command": "uptime",
+            "scan_interval": 1,
+        }
+        assert await async_setup_component(hass, "sensor", {"sensor": [sensor]})
+        await hass.async_start()
+        await asyncio.sleep(2.5)
+        entities = async_get_diagnostics(hass)["entities"]
+        assert [entity["entity_id"] for entity in entities] == ["sensor.uptime"]
+        change = entities[0]["change"]
+        assert change["writes_performed"] == 1
+        assert change["renders_skipped"] >= 1 # The fake host always answers the same
+
+    try:
+        run_with_hass(_async_test)
+    finally:
+        server.close()
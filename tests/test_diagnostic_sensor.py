@@ -0,0 +1,32 @@
+"""Tests for the per-connection diagnostic sensor"""
+from __future__ import annotations
+
+from custom_components.ssh.pool import ConnectionKey, SecurityOptions
+from custom_components.ssh.sensor import _diagnostic_unique_id
+
+PLAIN = ConnectionKey("192.0.2.1", 22, "admin", "secret", "asyncssh")
+
+
+def test_plain_connection_keeps_its_id() -> None:
+    assert _diagnostic_unique_id(PLAIN) == "ssh_diagnostics_admin@192.0.2.1:22_asyncssh"
+
+
+def test_connections_differing_by_options_get_their_own_id() -> None:
+    keys = [
+        PLAIN,
+        PLAIN._replace(security=SecurityOptions(kex=("curve25519-sha256",))),
+        PLAIN._replace(agent=True),
+        PLAIN._replace(jump=ConnectionKey("192.0.2.9", 22, "admin", "secret", "asyncssh")),
+        PLAIN._replace(jump=ConnectionKey("192.0.2.10", 22, "admin", "secret", "asyncssh")),
+    ]
+    assert len({_diagnostic_unique_id(key) for key in keys}) == len(keys)
+
+
+def test_id_leaves_credentials_out() -> None:
+    jumped = PLAIN._replace(jump=ConnectionKey("192.0.2.9", 22, "admin", "secret", "asyncssh"))
+    other_login = jumped._replace(
+        credential="/config/id_ed25519",
+        jump=jumped.jump._replace(credential="/config/id_ed25519"),
+    )
+    assert _diagnostic_unique_id(jumped) == _diagnostic_unique_id(other_login)
+    assert "secret" not in _diagnostic_unique_id(jumped)
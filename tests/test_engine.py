@@ -0,0 +1,63 @@
+"""Tests for the single-flight update engine"""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.ssh.engine import UpdateEngine
+
+
+def test_concurrent_refreshes_share_one_run() -> None:
+    async def _async_test() -> None:
+        runs = 0
+        release = asyncio.Event()
+
+        async def update() -> int:
+            nonlocal runs
+            runs += 1
+            await release.wait()
+            return runs
+
+        engine = UpdateEngine("test", update)
+        refreshes = [asyncio.ensure_future(engine.async_refresh()) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(*refreshes) == [1, 1, 1]
+        assert await engine.async_refresh() == 2 # The next refresh runs again
+        assert engine.as_dict() == {"executions": 2, "coalesced": 2}
+
+    asyncio.run(_async_test())
+
+
+def test_cancelling_one_caller_keeps_the_run() -> None:
+    async def _async_test() -> None:
+        release = asyncio.Event()
+
+        async def update() -> str:
+            await release.wait()
+            return "done"
+
+        engine = UpdateEngine("test", update)
+        first = asyncio.ensure_future(engine.async_refresh())
+        second = asyncio.ensure_future(engine.async_refresh())
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(_async_test())
+
+
+def test_cancel_stops_the_run_in_flight() -> None:
+    async def _async_test() -> None:
+        engine = UpdateEngine("test", lambda: asyncio.sleep(10))
+        refresh = asyncio.ensure_future(engine.async_refresh())
+        await asyncio.sleep(0)
+        engine.async_cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await refresh
+
+    asyncio.run(_async_test())
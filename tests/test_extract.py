@@ -0,0 +1,49 @@
+"""Tests for compiled value extractors"""
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from custom_components.ssh.extract import ValueExtractor, ValueType, extractor_from_config
+from custom_components.ssh.source import JsonPathSelector, RegexSelector
+
+
+def test_json_path_then_cast() -> None:
+    extractor = ValueExtractor(JsonPathSelector("ports.swp1[0].poe"), value_type=ValueType.FLOAT)
+    assert extractor.extract('{"ports": {"swp1": [{"poe": 4.5}]}}') == 4.5
+    assert extractor.extract('{"ports": {}}') is None
+    assert extractor.extract("not json") is None
+
+
+def test_regex_group() -> None:
+    extractor = ValueExtractor(RegexSelector(re.compile(r"temp=(\d+)")), value_type=ValueType.INT)
+    assert extractor.extract("cpu temp=51 C") == 51
+    assert extractor.extract("no reading") is None
+
+
+def test_field_with_separator() -> None:
+    extractor = ValueExtractor(field=2, separator=",")
+    assert extractor.extract(" a,b,c \n") == "c"
+    assert extractor.extract("a,b") is None
+    assert ValueExtractor(field=-1).extract("load 0.5  1.25\n") == "1.25"
+
+
+@pytest.mark.parametrize(
+    ("text", "value"),
+    [("42", 42), ("42.0", 42), (" 7\n", 7), ("n/a", None), ("inf", None), ("-inf", None),
+     ("1e999", None), ("nan", None)],
+)
+def test_int_cast(text: str, value: int | None) -> None:
+    assert ValueExtractor(value_type=ValueType.INT).extract(text) == value
+
+
+def test_none_output() -> None:
+    assert ValueExtractor(value_type=ValueType.FLOAT).extract(None) is None
+
+
+def test_from_config() -> None:
+    assert extractor_from_config({}) is None
+    extractor = extractor_from_config({"value_field": 0, "value_type": "int"})
+    assert extractor is not None
+    assert extractor.extract("12 packets") == 12
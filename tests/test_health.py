@@ -0,0 +1,64 @@
+"""Tests for the per-connection circuit breaker"""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.ssh.const import BACKOFF_MAX, BACKOFF_MIN, CIRCUIT_FAILURE_THRESHOLD
+from custom_components.ssh.health import CircuitOpenError, ConnectionHealth, ConnectionState
+
+MONOTONIC = "custom_components.ssh.health.time.monotonic"
+
+
+def open_circuit(health: ConnectionHealth) -> None:
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        health.record_failure()
+
+
+def test_failures_degrade_then_open_the_circuit() -> None:
+    health = ConnectionHealth("test")
+    health.record_failure()
+    assert health.state == ConnectionState.DEGRADED
+    health.check() # Still let through
+    with patch(MONOTONIC, return_value=1000):
+        open_circuit(health)
+        assert health.state == ConnectionState.OPEN_CIRCUIT
+        with pytest.raises(CircuitOpenError):
+            health.check()
+
+
+def test_one_probe_after_the_backoff() -> None:
+    health = ConnectionHealth("test")
+    with patch(MONOTONIC, return_value=1000):
+        open_circuit(health)
+    with patch(MONOTONIC, return_value=1000 + BACKOFF_MAX):
+        health.check() # The probe
+        with pytest.raises(CircuitOpenError): # Nobody else while it runs
+            health.check()
+        health.record_cancelled()
+        health.check() # A cancelled probe lets the next one through
+        health.record_success()
+    assert health.state == ConnectionState.READY
+    assert health.failures == 0
+
+
+def test_failed_probe_backs_off_longer() -> None:
+    health = ConnectionHealth("test")
+    with patch(MONOTONIC, return_value=0), patch("random.uniform", lambda low, high: high):
+        open_circuit(health)
+        assert health.retry_in == BACKOFF_MIN
+        health.record_failure()
+        assert health.retry_in == BACKOFF_MIN * 2
+        for _ in range(20):
+            health.record_failure()
+        assert health.retry_in == BACKOFF_MAX
+
+
+def test_reconnects_are_counted_from_ready() -> None:
+    health = ConnectionHealth("test")
+    health.record_connecting()
+    health.record_success()
+    health.record_connecting()
+    assert health.state == ConnectionState.CONNECTING
+    assert health.as_dict()["reconnects"] == 1
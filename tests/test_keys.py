@@ -0,0 +1,30 @@
+"""Tests for the private key store"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import paramiko
+import pytest
+
+from custom_components.ssh.keys import KeyStore
+
+
+def test_key_is_parsed_once_until_the_file_changes(tmp_path: Path) -> None:
+    path = str(tmp_path / "id_rsa")
+    paramiko.RSAKey.generate(1024).write_private_key_file(path)
+    store = KeyStore(None)
+
+    key = store.get(path, "paramiko")
+    assert isinstance(key, paramiko.RSAKey)
+    assert store.get(path, "paramiko") is key
+    assert (store.loads, store.hits) == (1, 1)
+
+    os.utime(path, (0, 0))
+    assert store.get(path, "paramiko") is not key
+    assert store.loads == 2
+
+
+def test_missing_key(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        KeyStore(None).get(str(tmp_path / "missing"), "paramiko")
@@ -0,0 +1,85 @@
+"""Tests for bounded output capture"""
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from common import run_with_hass
+from custom_components.ssh.pool import async_get_pool
+from custom_components.ssh.reader import CaptureMode, OutputCapture, capture_from_config
+from fake_ssh_server import start_servers
+
+
+def test_exact_fit_is_not_truncated() -> None:
+    """Output filling max_bytes exactly is kept whole and reading goes on"""
+    reader = OutputCapture(5).reader()
+    assert not reader.feed(b"123")
+    assert not reader.feed(b"45")
+    assert reader.result() == "12345"
+    assert not reader.truncated
+
+
+def test_byte_past_the_limit_truncates() -> None:
+    """The first byte past max_bytes ends the capture"""
+    reader = OutputCapture(5).reader()
+    assert not reader.feed(b"12345")
+    assert reader.feed(b"6")
+    assert reader.result() == "12345"
+    assert reader.truncated
+
+
+def test_tail_keeps_the_last_bytes() -> None:
+    reader = OutputCapture(4, CaptureMode.TAIL).reader()
+    assert not reader.feed(b"12345")
+    assert not reader.feed(b"678")
+    assert (reader.result(), reader.truncated) == ("5678", True)
+    assert reader.bytes_read == 8
+
+
+def test_regex_stops_at_the_first_match_across_chunks() -> None:
+    reader = OutputCapture(64, CaptureMode.REGEX, re.compile(r"temp=(\d+)")).reader()
+    assert not reader.feed(b"cpu te")
+    assert reader.feed(b"mp=51 C\n")
+    assert reader.result() == "51"
+    assert reader.feed(b"ignored") # Nothing more is needed once matched
+
+
+def test_multibyte_character_split_across_chunks() -> None:
+    reader = OutputCapture().reader()
+    data = "température".encode()
+    reader.feed(data[:3])
+    reader.feed(data[3:])
+    assert reader.result() == "température"
+
+
+def test_capture_from_config() -> None:
+    assert capture_from_config({"max_output_bytes": 10, "capture": "tail"}) == OutputCapture(
+        10, CaptureMode.TAIL
+    )
+    pattern = re.compile("x")
+    assert capture_from_config(
+        {"max_output_bytes": 10, "capture": "head", "capture_regex": pattern}
+    ) == OutputCapture(10, CaptureMode.REGEX, pattern)
+
+
+@pytest.mark.parametrize("backend", ["asyncssh", "paramiko"])
+def test_exact_fit_command_reports_exit_status(backend: str) -> None:
+    """A command whose output fills max_bytes exactly is read to its exit"""
+    server = start_servers(1, 0, 16)[0]
+
+    async def _async_test(hass) -> None:
+        pool = async_get_pool(hass)
+        connection = pool.async_acquire(
+            "127.0.0.1", server.port, "test", None, "test", backend
+        )
+        result = await connection.async_run("payload", 5, OutputCapture(16))
+        await pool.async_release(connection)
+        assert len(result.stdout) == 16
+        assert not result.truncated
+        assert result.exit_status == 0
+
+    try:
+        run_with_hass(_async_test)
+    finally:
+        server.close()
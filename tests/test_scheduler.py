@@ -0,0 +1,49 @@
+"""Tests for adaptive polling"""
+from __future__ import annotations
+
+import asyncio
+import socket
+from typing import Any
+
+import pytest
+
+from common import run_with_hass
+from custom_components.ssh.const import DATA_SCHEDULER, DOMAIN
+from homeassistant.setup import async_setup_component
+
+ENTITIES: dict[str, dict[str, Any]] = {
+    "sensor": {"command": "uptime"},
+    "switch": {"command_on": "on", "command_off": "off", "command_state": "state"},
+}
+
+
+@pytest.mark.parametrize("platform", ENTITIES)
+def test_failed_polls_keep_the_interval(platform: str) -> None:
+    """An unreachable host is not mistaken for output that stopped changing"""
+    with socket.socket() as sock: # Free a port, so connecting to it is refused
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    async def _async_test(hass) -> None:
+        config = {
+            "platform": DOMAIN,
+            "name": "unreachable",
+            "unique_id": "unreachable",
+            "host": "127.0.0.1",
+            "port": port,
+            "password": "test",
+            "scan_interval": 1,
+            "min_scan_interval": 1,
+            "max_scan_interval": 30,
+            **ENTITIES[platform],
+        }
+        assert await async_setup_component(hass, platform, {platform: [config]})
+        await hass.async_start()
+        await asyncio.sleep(3.5)
+
+        scheduler = hass.data[DOMAIN][DATA_SCHEDULER]
+        assert scheduler.as_dict()["intervals"] == {
+            f"SSH {platform.capitalize()} - unreachable": 1.0
+        }
+
+    run_with_hass(_async_test)
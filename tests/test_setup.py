@@ -0,0 +1,47 @@
+"""Tests for setting up the sensor and switch platforms"""
+from __future__ import annotations
+
+import asyncio
+
+from homeassistant.setup import async_setup_component
+
+from common import run_with_hass
+from custom_components.ssh.const import DATA_POOL, DOMAIN
+from fake_ssh_server import start_servers
+
+
+def test_rejected_entity_releases_its_connection() -> None:
+    """A duplicate unique_id does not keep the connection referenced"""
+    server = start_servers(1, 0, 16)[0]
+
+    async def _async_test(hass) -> None:
+        base = {
+            "platform": DOMAIN,
+            "host": "127.0.0.1",
+            "port": server.port,
+            "username": "test",
+            "password": "test",
+            "unique_id": "duplicate",
+        }
+        sensors = [{**base, "name": "first", "command": "one"}, {**base, "command": "two"}]
+        switches = [{**base, "name": "switch"}, {**base, "name": "switch_again"}]
+        assert await async_setup_component(hass, "sensor", {"sensor": sensors})
+        assert await async_setup_component(hass, "switch", {"switch": switches})
+        await hass.async_block_till_done()
+        await asyncio.sleep(0) # Let the releases of the rejected entities run
+
+        assert sorted(hass.states.async_entity_ids()) == ["sensor.first", "switch.duplicate"]
+        pool = hass.data[DOMAIN][DATA_POOL]
+        [connection] = pool._connections.values()
+        assert connection.refs == 2
+
+        for entity_id in ("sensor.first", "switch.duplicate"):
+            entity = hass.data["entity_components"][entity_id.split(".")[0]].get_entity(entity_id)
+            await entity.async_remove()
+        assert not pool._connections
+        assert connection.closed
+
+    try:
+        run_with_hass(_async_test)
+    finally:
+        server.close()
@@ -0,0 +1,40 @@
+"""Tests for commands run in the persistent shell"""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from common import run_with_hass
+from custom_components.ssh.pool import async_get_pool
+from custom_components.ssh.transport import ConnectionClosedError
+from fake_ssh_server import start_servers
+
+
+@pytest.mark.parametrize("backend", ["asyncssh", "paramiko"])
+def test_close_during_shell_run_does_not_reconnect(backend: str) -> None:
+    """A connection closed while a command is in the shell stays closed"""
+    server = start_servers(1, 0.5, 16)[0]
+
+    async def _async_test(hass) -> None:
+        pool = async_get_pool(hass)
+        connection = pool.async_acquire(
+            "127.0.0.1", server.port, "test", None, "test", backend, shell=True
+        )
+        await connection.async_run("warm up", 5)
+        assert connection.shell_starts == 1
+
+        run = asyncio.create_task(connection.async_run("in flight", 5))
+        await asyncio.sleep(0.2) # Sent, the fake host is still answering
+        await pool.async_release(connection)
+        with pytest.raises(ConnectionClosedError):
+            await run
+
+        await asyncio.sleep(0.5)
+        assert server.connections == 1
+        assert connection.shell_starts == 1
+
+    try:
+        run_with_hass(_async_test)
+    finally:
+        server.close()
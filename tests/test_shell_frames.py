@@ -0,0 +1,96 @@
+"""Tests for framing commands sent to the persistent shell"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import subprocess
+
+import pytest
+
+from custom_components.ssh.reader import OutputCapture
+from custom_components.ssh.shell import (
+    FrameReader,
+    ShellDesyncError,
+    build_shell_command,
+    build_shell_sync,
+)
+
+SENTINEL = "HASS-SSH-test"
+
+
+def feed_bytes(frame: FrameReader, data: bytes) -> bool:
+    """Feed one byte at a time, so every sentinel is split across chunks"""
+    return any([frame.feed(data[index : index + 1]) for index in range(len(data))])
+
+
+def test_stdout_frame_split_across_chunks() -> None:
+    frame = FrameReader(SENTINEL, OutputCapture().reader(), True)
+    assert feed_bytes(frame, f"{SENTINEL}-begin\nout\n{SENTINEL}\n{SENTINEL} 3\n".encode())
+    assert frame.reader.result() == f"out\n{SENTINEL}"
+    assert frame.exit_status == 3
+    assert not frame.skipped and not frame.leftover
+
+
+def test_stderr_frame_has_no_exit_status() -> None:
+    frame = FrameReader(SENTINEL, OutputCapture().reader(), False)
+    assert frame.feed(f"{SENTINEL}-begin\nerr\n{SENTINEL}\n".encode())
+    assert frame.reader.result() == "err"
+    assert frame.exit_status is None
+
+
+def test_output_around_the_frame_is_reported() -> None:
+    frame = FrameReader(SENTINEL, OutputCapture().reader(), True)
+    assert frame.feed(f"stray\n{SENTINEL}-begin\n\n{SENTINEL} 0\nlate".encode())
+    assert frame.skipped == len("stray\n")
+    assert frame.leftover == b"late"
+    assert frame.reader.result() == ""
+
+
+def test_unfinished_frame_waits_for_the_exit_code_line() -> None:
+    frame = FrameReader(SENTINEL, OutputCapture().reader(), True)
+    assert not frame.feed(f"{SENTINEL}-begin\nout\n{SENTINEL} 1".encode())
+    assert not frame.done
+    assert frame.feed(b"2\n")
+    assert frame.exit_status == 12
+
+
+def test_garbled_exit_code_is_a_desync() -> None:
+    frame = FrameReader(SENTINEL, None, True)
+    with pytest.raises(ShellDesyncError):
+        frame.feed(f"{SENTINEL}-begin\n\n{SENTINEL} oops\n".encode())
+
+
+def test_sync_frame_skips_the_banner() -> None:
+    frame = FrameReader(SENTINEL, None, True, begin=False)
+    assert frame.feed(f"Welcome\nLast login: never\n\n{SENTINEL} 0\n".encode())
+    assert not frame.skipped and not frame.leftover
+
+
+def run_script(cwd: Path, *scripts: bytes) -> subprocess.CompletedProcess[bytes]:
+    return subprocess.run(
+        ["sh"], input=b"".join(scripts), capture_output=True, check=False, cwd=cwd
+    )
+
+
+def test_command_runs_framed_in_a_subshell(tmp_path: Path) -> None:
+    process = run_script(
+        tmp_path,
+        build_shell_sync("HASS-SSH-sync"),
+        build_shell_command("cd /; echo out; echo err >&2; exit 4", SENTINEL),
+        build_shell_command("pwd", "HASS-SSH-next"),
+    )
+    sync_out = FrameReader("HASS-SSH-sync", None, True, begin=False)
+    stdout = FrameReader(SENTINEL, OutputCapture().reader(), True)
+    stderr = FrameReader(SENTINEL, OutputCapture().reader(), False)
+    assert sync_out.feed(process.stdout)
+    assert stdout.feed(sync_out.leftover)
+    assert stderr.feed(process.stderr.split(b"\nHASS-SSH-sync\n", 1)[1])
+    assert (stdout.reader.result(), stderr.reader.result(), stdout.exit_status) == (
+        "out\n",
+        "err\n",
+        4,
+    )
+    # The cd and exit stayed in the subshell, so the next command ran where the shell started
+    after = FrameReader("HASS-SSH-next", OutputCapture().reader(), True)
+    assert after.feed(stdout.leftover)
+    assert os.path.realpath(after.reader.result().strip()) == os.path.realpath(tmp_path)
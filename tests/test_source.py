@@ -0,0 +1,54 @@
+"""Tests for shared command sources and their selectors"""
+from __future__ import annotations
+
+import re
+from types import SimpleNamespace
+
+from custom_components.ssh.reader import CaptureMode, OutputCapture
+from custom_components.ssh.source import (
+    JsonPathSelector,
+    RegexSelector,
+    SourceOutput,
+    async_get_source,
+)
+
+OUTPUT = SourceOutput('{"ports": [{"name": "swp1", "poe": 4.5, "up": true}], "host": "sw1"}')
+
+
+def test_json_path_selector() -> None:
+    assert JsonPathSelector("host").select(OUTPUT) == "sw1"
+    assert JsonPathSelector("ports[0].poe").select(OUTPUT) == "4.5"
+    assert JsonPathSelector("ports[-1].up").select(OUTPUT) == "true"
+    assert JsonPathSelector("ports[0]").select(OUTPUT) == (
+        '{"name": "swp1", "poe": 4.5, "up": true}'
+    )
+    assert JsonPathSelector("ports[1].poe").select(OUTPUT) is None
+    assert JsonPathSelector("host.name").select(OUTPUT) is None
+    assert JsonPathSelector("host").select(SourceOutput("not json")) is None
+
+
+def test_regex_selector() -> None:
+    output = SourceOutput("swp1 up 4.5W\nswp2 down 0W\n")
+    assert RegexSelector(re.compile(r"swp2 (\w+)")).select(output) == "down"
+    assert RegexSelector(re.compile(r"\d+\.\d+W")).select(output) == "4.5W"
+    assert RegexSelector(re.compile(r"swp3")).select(output) is None
+
+
+def test_sources_share_only_matching_captures() -> None:
+    hass = SimpleNamespace(data={})
+    connection = SimpleNamespace(key="host")
+    head = async_get_source(hass, connection, "show", 10, OutputCapture(100), None)
+    larger = async_get_source(hass, connection, "show", 30, OutputCapture(400), None)
+    tail = async_get_source(
+        hass, connection, "show", 10, OutputCapture(100, CaptureMode.TAIL), None
+    )
+    batched = async_get_source(hass, connection, "show", 10, OutputCapture(100), object())
+
+    assert larger is head
+    assert head._timeout == 30
+    assert head._capture == OutputCapture(400)
+    assert tail is not head and tail._capture.mode == CaptureMode.TAIL
+    assert batched is not head
+
+    async_get_source(hass, connection, "show", 5, OutputCapture(50), None)
+    assert (head._timeout, head._capture.max_bytes) == (30, 400)
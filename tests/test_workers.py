@@ -0,0 +1,55 @@
+"""Tests for the worker threads that run paramiko calls"""
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from common import run_with_hass
+from custom_components.ssh.pool import SSHConnectionPool
+from custom_components.ssh.workers import SSHWorkerPool, WorkersSaturatedError
+
+
+def test_full_queue_sheds_calls() -> None:
+    async def _async_test() -> None:
+        workers = SSHWorkerPool("test", 1, 1)
+        release = threading.Event()
+        running = asyncio.ensure_future(workers.async_run(release.wait))
+        queued = asyncio.ensure_future(workers.async_run(lambda: "queued"))
+        await asyncio.sleep(0.1)
+        assert workers.saturated
+        assert workers.as_dict()["saturated"]
+        with pytest.raises(WorkersSaturatedError):
+            await workers.async_run(lambda: "shed")
+        closing = asyncio.ensure_future(workers.async_run(lambda: "closed", shed=False))
+        release.set()
+        assert await asyncio.gather(running, queued, closing) == [True, "queued", "closed"]
+        assert not workers.saturated
+        assert workers.rejected == 1
+        workers.shutdown()
+
+    asyncio.run(_async_test())
+
+
+def test_worker_per_host_caps_sessions_at_the_thread() -> None:
+    async def _async_test(hass) -> None:
+        pool = SSHConnectionPool(hass, {"worker_per_host": True})
+        paramiko = pool.async_acquire("192.0.2.1", 22, "test", None, "test", "paramiko")
+        asyncssh = pool.async_acquire("192.0.2.1", 22, "test", None, "test", "asyncssh")
+        assert paramiko.workers.max_workers == 1
+        assert paramiko.max_sessions == 1
+        assert asyncssh.max_sessions == 8 # Runs on the event loop, no threads involved
+        shared = SSHConnectionPool(hass, {})
+        other = shared.async_acquire("192.0.2.1", 22, "test", None, "test", "paramiko")
+        assert other.max_sessions == 8
+        for warm_up, connection in (
+            (pool.warm_up, paramiko), (pool.warm_up, asyncssh), (shared.warm_up, other)
+        ):
+            warm_up.async_cancel(connection) # Nothing listens on the documentation address
+        await pool.async_close()
+        await shared.async_close()
+        pool.async_shutdown_workers()
+        shared.async_shutdown_workers()
+
+    run_with_hass(_async_test)